@@ -0,0 +1,157 @@
+import os
+import time
+import random
+import asyncio
+from telemetry import span, metrics
+
+try:
+    from google.api_core import exceptions as google_errors
+    RETRYABLE_ERRORS = (
+        google_errors.TooManyRequests,
+        google_errors.ResourceExhausted,
+        google_errors.InternalServerError,
+        google_errors.ServiceUnavailable,
+        google_errors.DeadlineExceeded,
+    )
+except ImportError:
+    RETRYABLE_ERRORS = ()
+
+
+AI_CALLS = metrics.counter("ziva_ai_calls_total", "Gemini calls by outcome (ok, retry, failed, rejected).")
+
+
+class AIUnavailable(Exception):
+    # Raised instead of calling the model: queue full, breaker open, or retries exhausted
+    pass
+
+
+def is_retryable(error):
+    if RETRYABLE_ERRORS and isinstance(error, RETRYABLE_ERRORS): return True
+    code = getattr(error, "code", None)
+    if isinstance(code, int): return code == 429 or code >= 500
+    text = str(error)
+    return "429" in text or "quota" in text.lower() or "503" in text or "500" in text
+
+
+class CircuitBreaker:
+    # closed -> (N consecutive failures) -> open for `cooldown` -> half-open: one trial call
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    @property
+    def state(self):
+        if self.opened_at is None: return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown: return "open"
+        return "half_open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed": return True
+        if state == "half_open" and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def failure(self):
+        self.failures += 1
+        if self.trial_running or self.failures >= self.threshold:
+            if self.opened_at is None or self.trial_running:
+                print(f"🔌 AI breaker OPEN for {self.cooldown:.0f}s after {self.failures} failures")
+            self.opened_at = time.monotonic()
+        self.trial_running = False
+
+
+class AIWorker:
+    # The one way to talk to Gemini: bounded concurrency, a bounded waiting line,
+    # exponential backoff on 429/5xx and a circuit breaker around all of it.
+    def __init__(self, model=None):
+        self.model = model
+        self.max_concurrency = int(os.getenv("ZIVA_AI_CONCURRENCY", "4"))
+        self.max_queue = int(os.getenv("ZIVA_AI_QUEUE_LIMIT", "32"))
+        self.max_retries = int(os.getenv("ZIVA_AI_RETRIES", "3"))
+        self.backoff_base = float(os.getenv("ZIVA_AI_BACKOFF", "0.5"))
+        self.breaker = CircuitBreaker(
+            threshold=int(os.getenv("ZIVA_AI_BREAKER_THRESHOLD", "5")),
+            cooldown=float(os.getenv("ZIVA_AI_BREAKER_COOLDOWN", "30")),
+        )
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self.waiting = 0
+        self.active = 0
+        self.calls = 0
+        self.rejected = 0
+        self.retries = 0
+
+    async def _call(self, prompt):
+        # Native async client when the SDK has it, thread otherwise
+        with span("gemini.call"):
+            if hasattr(self.model, "generate_content_async"):
+                response = await self.model.generate_content_async(prompt)
+            else:
+                response = await asyncio.to_thread(self.model.generate_content, prompt)
+            return response.text
+
+    async def generate(self, prompt):
+        if not self.model: raise AIUnavailable("AI offline")
+        if not self.breaker.allow():
+            self.rejected += 1
+            AI_CALLS.inc(outcome="rejected")
+            raise AIUnavailable("AI breaker open")
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            AI_CALLS.inc(outcome="rejected")
+            raise AIUnavailable("AI queue full")
+
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        except asyncio.CancelledError:
+            self.breaker.trial_running = False
+            raise
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self.calls += 1
+                    text = await self._call(prompt)
+                    self.breaker.success()
+                    AI_CALLS.inc(outcome="ok")
+                    return text
+                except Exception as e:
+                    if not is_retryable(e) or attempt == self.max_retries:
+                        self.breaker.failure()
+                        AI_CALLS.inc(outcome="failed")
+                        raise AIUnavailable(str(e)) from e
+                    self.retries += 1
+                    AI_CALLS.inc(outcome="retry")
+                    delay = self.backoff_base * (2 ** attempt) * random.uniform(0.8, 1.2)
+                    print(f"⏳ AI retry {attempt + 1}/{self.max_retries} in {delay:.1f}s ({e})")
+                    await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            # Request deadline hit mid-call: not the model's fault, but free the half-open trial
+            self.breaker.trial_running = False
+            raise
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    def stats(self):
+        return {
+            "breaker": self.breaker.state,
+            "in_flight": self.active,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "retries": self.retries,
+            "rejected": self.rejected,
+        }
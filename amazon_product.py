@@ -0,0 +1,143 @@
+import re
+from urllib.parse import urlparse
+from fast_fetch import http_client, soup_of, json_ld, ld_nodes_of_type, meta_content, site_url
+from product_identity import ASIN_PATTERN
+from retailers import parse_price
+from telemetry import span, metrics
+from site_guard import site_guard, SiteBlocked
+
+# --- AMAZON PRODUCT PAGES ---
+# /scan with an Amazon URL: one plain GET of the product page, read from JSON-LD, meta tags
+# and the known price/review blocks. The browser is only the fallback (bot check, missing
+# price), and whatever we learn is cached per ASIN so the next scan of it costs nothing.
+
+AMAZON_LOOKUPS = metrics.counter("ziva_amazon_product_total", "Amazon product page lookups by how they were served.")
+
+# Robot check / captcha interstitials, served with HTTP 200
+BOT_CHECK_MARKERS = (
+    "/errors/validateCaptcha",
+    "Enter the characters you see below",
+    "Sorry, we just need to make sure you're not a robot",
+    "To discuss automated access to Amazon data please contact",
+)
+PRICE_SELECTORS = (
+    '#corePriceDisplay_desktop_feature_div .priceToPay .a-offscreen',
+    '#corePriceDisplay_desktop_feature_div .a-price-whole',
+    '#corePrice_feature_div .a-price .a-offscreen',
+    '#apex_desktop .a-price-whole',
+    '#priceblock_dealprice',
+    '#priceblock_ourprice',
+    '.a-price .a-offscreen',
+    '.a-price-whole',
+)
+REVIEW_SELECTORS = ('#acrCustomerReviewText', '#averageCustomerReviews .a-size-base')
+# "<product> : Amazon.in: Electronics" -> "<product>"
+TITLE_SUFFIX = re.compile(r'\s*:\s*Amazon\.[a-z.]+(:.*)?$', re.I)
+GENERIC_TITLES = {"amazon.in", "amazon.com", "robot check", ""}
+
+# Benchmarks serve Amazon from the stand-in (ZIVA_SITE_ROOT/amazon/...)
+STAND_IN = site_url("amazon", None)
+
+
+def is_amazon_url(url):
+    if not url: return False
+    if STAND_IN and url.startswith(STAND_IN + "/"): return True
+    host = (urlparse(url if "://" in url else "https://" + url).hostname or "").lower()
+    return "amazon." in host or host == "amzn.in" or host.endswith(".amzn.in") or host == "amzn.to"
+
+def asin_of(url):
+    match = ASIN_PATTERN.search(urlparse(url).path + "/")
+    return match.group(1) if match else None
+
+def clean_title(title):
+    title = TITLE_SUFFIX.sub("", " ".join((title or "").split()))
+    return None if title.lower() in GENERIC_TITLES else title
+
+def _first_text(soup, selectors):
+    for selector in selectors:
+        el = soup.select_one(selector)
+        if el and el.get_text(strip=True): return el.get_text(" ", strip=True)
+    return None
+
+def parse_product(html):
+    # {"title", "price", "reviews", "asin", "blocked"} from a product page's HTML
+    if any(marker in html for marker in BOT_CHECK_MARKERS):
+        return {"title": None, "price": 0, "reviews": 0, "asin": None, "blocked": True}
+    soup = soup_of(html)
+
+    product = (ld_nodes_of_type(json_ld(soup), "Product") or [{}])[0]
+    offers = product.get("offers") or {}
+    if isinstance(offers, list): offers = offers[0] if offers else {}
+    rating = product.get("aggregateRating") or {}
+
+    title = (clean_title(product.get("name"))
+             or clean_title(_first_text(soup, ['#productTitle']))
+             or clean_title(meta_content(soup, "og:title", "title"))
+             or clean_title(soup.title.get_text() if soup.title else None))
+    price = (parse_price(offers.get("price") or offers.get("lowPrice"))
+             or parse_price(_first_text(soup, PRICE_SELECTORS)) or 0)
+    reviews = (parse_price(rating.get("reviewCount") or rating.get("ratingCount"))
+               or parse_price(_first_text(soup, REVIEW_SELECTORS)) or 0)
+
+    asin_input = soup.select_one('input#ASIN, input[name="ASIN"]')
+    canonical = soup.select_one('link[rel="canonical"]')
+    asin = ((asin_input.get("value") if asin_input else None)
+            or (asin_of(canonical.get("href", "")) if canonical else None))
+    return {"title": title, "price": price, "reviews": reviews, "asin": asin, "blocked": False}
+
+
+class AmazonProducts:
+    def __init__(self, cache=None, http=None):
+        self.cache = cache  # ResultCache; entries live under the "product" source
+        self.http = http or http_client
+
+    @staticmethod
+    def page_url(url, asin):
+        # Tracking-free /dp/ URL on real Amazon hosts: fewer redirects, friendlier to their CDN cache
+        parsed = urlparse(url)
+        host = (parsed.hostname or "").lower()
+        if asin and "amazon." in host: return f"https://{host}/dp/{asin}"
+        return url
+
+    async def lookup(self, url):
+        # {"title", "price", "reviews", "asin"} from cache or plain HTTP; None -> use the browser
+        asin = asin_of(url)
+        if asin and self.cache:
+            hit, found = self.cache.get("product", f"asin:{asin}")
+            if hit:
+                AMAZON_LOOKUPS.inc(outcome="cache")
+                print(f"⚡ Amazon: {asin} from cache")
+                return found
+
+        try:
+            html = await self.http.get_text(self.page_url(url, asin), site="amazon")
+        except SiteBlocked as e:
+            # The user asked for this page: the browser still gets its try
+            AMAZON_LOOKUPS.inc(outcome="blocked")
+            print(f"🧱 Amazon: {e}, falling back to the browser")
+            return None
+        if not html:
+            AMAZON_LOOKUPS.inc(outcome="miss")
+            return None
+        with span("amazon.parse"):
+            data = parse_product(html)
+        if data["blocked"]:
+            site_guard.report_block("amazon", "captcha")
+            AMAZON_LOOKUPS.inc(outcome="blocked")
+            print("🤖 Amazon: Bot check on the HTTP path, falling back to the browser")
+            return None
+        if not (data["title"] and data["price"]):
+            AMAZON_LOOKUPS.inc(outcome="miss")
+            return None
+
+        found = {"title": data["title"], "price": data["price"], "reviews": data["reviews"],
+                 "asin": data["asin"] or asin}
+        AMAZON_LOOKUPS.inc(outcome="http")
+        print(f"⚡ Amazon: {found['asin']} served without a browser")
+        self.remember(found)
+        return found
+
+    def remember(self, found):
+        # Only complete reads: a bot-check page must never be cached as the product
+        if self.cache and found.get("asin") and found.get("title") and found.get("price"):
+            self.cache.set("product", f"asin:{found['asin']}", found)
@@ -1,19 +1,42 @@
 import os
+import time
 import asyncio
 import re
 import json
-from fastapi import FastAPI
+from urllib.parse import urlparse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import google.generativeai as genai
-from playwright.async_api import async_playwright
+from browser_pool import BrowserPool
+from page_profile import profile_for
+from amazon_product import AmazonProducts, is_amazon_url, asin_of
+from fast_fetch import http_client
+from result_cache import ResultCache
+from single_flight import SingleFlight
+from request_budget import RequestBudget, run_with_deadline, parse_budget
+from price_store import PriceStore
+from prewarm import PrewarmScheduler
+from ai_worker import AIWorker, AIUnavailable
+from scam_heuristics import assess, prescreen
+from job_queue import JobQueue, ScanWorker, check_callback
+from hunter_pool import HunterPool
+from site_guard import site_guard
+from product_identity import ProductResolver, url_identifiers
+from retailers import parse_price
+from bulk_scan import BulkScan, parse_items, checkpoint_path, is_url
+from telemetry import TracingMiddleware, span, metrics
 
 # --- IMPORT HUNTERS ---
 try:
     from price_hunter import PriceHunter
+    from retailers import ADAPTERS
 except ImportError:
     print("⚠️ WARNING: price_hunter.py not found. Market scanning disabled.")
     PriceHunter = None
+    ADAPTERS = {}
 
 try:
     from history_hunter import HistoryHunter
@@ -28,13 +51,68 @@ except ImportError:
 
 load_dotenv()
 
-app = FastAPI(title="ZIVA: Commerce Intelligence Engine")
+# --- SHARED BROWSER POOL ---
+# One Chromium for the whole process, started/stopped with the app.
+browser_pool = BrowserPool()
+
+# --- HUNTER PROCESSES ---
+# ZIVA_HUNTER_PROCESSES=N moves market/history hunts into N child processes (one Chromium
+# each), so scraping uses every core. 0 (default): hunts share browser_pool above.
+hunter_pool = HunterPool()
+
+# --- RESULT CACHE ---
+# Market / history / AI results keyed by the normalized product query.
+result_cache = ResultCache()
+
+# Amazon product pages over plain HTTP, cached per ASIN (browser only as the fallback)
+amazon_products = AmazonProducts(result_cache)
+
+# --- IN-FLIGHT DEDUPLICATION ---
+# Identical concurrent lookups share one hunter/AI run instead of each starting their own.
+flights = SingleFlight()
+
+# --- PRICE OBSERVATIONS ---
+# Every price we scrape is kept, so history can come from our own series.
+price_store = PriceStore()
+
+# --- JOB MODE ---
+# ZIVA_JOB_MODE=1: POST /scan only enqueues and returns a job ID; worker.py processes (or
+# ZIVA_JOB_INLINE_WORKERS in this process) do the scraping. Results via GET /jobs/{id} or a callback.
+JOB_MODE = os.getenv("ZIVA_JOB_MODE", "0") == "1"
+job_queue = JobQueue() if JOB_MODE else None
+INLINE_WORKERS = int(os.getenv("ZIVA_JOB_INLINE_WORKERS", "0")) if JOB_MODE else 0
+
+@asynccontextmanager
+async def lifespan(app):
+    await browser_pool.start()
+    await hunter_pool.start()
+    prewarmer.start()
+    inline_worker = None
+    if INLINE_WORKERS:
+        inline_worker = ScanWorker(job_queue, run_job, notify=http_client.post_json, concurrency=INLINE_WORKERS)
+        inline_worker.start()
+    try:
+        yield
+    finally:
+        if inline_worker: await inline_worker.stop()
+        await prewarmer.stop()
+        await hunter_pool.stop()
+        await browser_pool.stop()
+        http_client.close()
+
+app = FastAPI(title="ZIVA: Commerce Intelligence Engine", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id"],
 )
+# Outermost, so the trace covers CORS handling and the whole streamed body
+app.add_middleware(TracingMiddleware)
+
+# Keep proxies (Render, nginx) from buffering Server-Sent Events
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
 
 # --- AI CONFIGURATION (From ziva-backend) ---
 api_key = os.getenv("GEMINI_API_KEY")
@@ -47,6 +125,9 @@ if api_key:
 else:
     print("⚠️ AI CORTEX: OFFLINE (Missing GEMINI_API_KEY)")
 
+# Every Gemini call goes through this: concurrency cap, backoff, circuit breaker
+ai_worker = AIWorker(model)
+
 
 # --- UTILS ---
 def clean_title_for_search(title):
@@ -63,6 +144,13 @@ def clean_title_for_search(title):
     if len(words) > 5: return " ".join(words[:5])
     return clean
 
+# --- PRODUCT IDENTITY ---
+# Titles, ASINs and Flipkart PIDs -> one canonical ID, used for every cache and in-flight key.
+identity = ProductResolver(clean_title_for_search)
+
+# Retailer cards matched at least this confidently teach the resolver a new alias
+IDENTITY_LEARN_MIN = float(os.getenv("ZIVA_IDENTITY_LEARN_MIN", "0.85"))
+
 def extract_key_fields_from_url(url):
     try:
         # Extract meaningful part from Amazon/Flipkart URLs
@@ -81,6 +169,23 @@ def extract_key_fields_from_url(url):
         return ""
 
 # --- CORE LOGIC: AI ANALYSIS (From ziva-backend) ---
+def quick_verdict(title, price=0, reviews=0):
+    # Local rules' best guess while the model is busy/unhealthy. Never cached as an AI verdict.
+    verdict = assess(title, price, reviews)
+    verdict.pop("confident")
+    verdict["engine"] = "heuristic"
+    return verdict
+
+def ai_cacheable(verdict):
+    return verdict.get("verdict") != "UNKNOWN" and verdict.get("engine") != "heuristic"
+
+AI_RULES = """RULES:
+    1. TRUST THE REVIEW COUNT: If a product has reviews on Amazon, it is RELEASED.
+    2. IGNORE your training data cutoff regarding release dates.
+    3. FOCUS ONLY ON SCAMS: Look for "16TB SSD for $20" or gibberish brand names.
+    4. If the specs look realistic for the price, verdict is SAFE.
+    """
+
 async def run_ai_analysis(title: str, price=0, reviews=0):
     # Added price/reviews args to support the website's usage,
     # but the core logic will follow ziva-backend's prompt structure
@@ -88,6 +193,10 @@ async def run_ai_analysis(title: str, price=0, reviews=0):
     default_response = {
         "verdict": "UNKNOWN", "score": 50, "reason": "AI currently unavailable."
     }
+    # Obvious cases (impossible price-per-spec, gibberish brand, established listing) skip the LLM
+    screened = prescreen(title, price, reviews)
+    if screened: return screened
+
     if not model: return default_response
 
     # Using the backend's prompt
@@ -97,20 +206,14 @@ async def run_ai_analysis(title: str, price=0, reviews=0):
     Price: {price}
     Reviews: {reviews}
     
-    RULES:
-    1. TRUST THE REVIEW COUNT: If a product has reviews on Amazon, it is RELEASED.
-    2. IGNORE your training data cutoff regarding release dates.
-    3. FOCUS ONLY ON SCAMS: Look for "16TB SSD for $20" or gibberish brand names.
-    4. If the specs look realistic for the price, verdict is SAFE.
-    
+    {AI_RULES}
     Respond in this format: VERDICT | REASON
     Example: SAFE | Specs match price and high review count confirms authenticity.
     Example: SUSPICIOUS | Generic brand name with impossible specs.
     """
 
     try:
-        response = await asyncio.to_thread(model.generate_content, prompt)
-        text = response.text.strip()
+        text = (await ai_worker.generate(prompt)).strip()
         
         verdict = "SAFE"
         reason = "Verified."
@@ -130,128 +233,356 @@ async def run_ai_analysis(title: str, price=0, reviews=0):
 
         return {"verdict": verdict, "score": score, "reason": reason}
 
+    except AIUnavailable as e:
+        print(f"⚡ AI unavailable ({e}), using quick verdict")
+        return quick_verdict(title, price, reviews)
     except Exception as e:
         print(f"❌ AI Error: {e}")
         return default_response
 
+# --- CORE LOGIC: BATCHED AI ANALYSIS ---
+# Many products per prompt (JSON in, JSON out) instead of one round-trip each.
+AI_BATCH_SIZE = int(os.getenv("ZIVA_AI_BATCH_SIZE", "10"))
+AI_BATCH_MAX_ITEMS = int(os.getenv("ZIVA_AI_BATCH_MAX_ITEMS", "200"))
+
+def verdict_entry(verdict_raw, reason):
+    verdict_raw = str(verdict_raw).upper()
+    if "SUSPICIOUS" in verdict_raw:
+        return {"verdict": "SUSPICIOUS", "score": 40, "reason": reason or "Flagged."}
+    return {"verdict": "SAFE", "score": 90, "reason": reason or "Verified."}
+
+def parse_batch_verdicts(text, count):
+    # Model output -> {index: verdict}; tolerates ```json fences and chatter around the array
+    match = re.search(r'\[.*\]', text or "", re.S)
+    if not match: return {}
+    try: rows = json.loads(match.group(0))
+    except ValueError: return {}
+
+    verdicts = {}
+    for position, row in enumerate(rows):
+        if not isinstance(row, dict) or "verdict" not in row: continue
+        index = row.get("id", position)
+        if isinstance(index, int) and 0 <= index < count:
+            verdicts[index] = verdict_entry(row["verdict"], row.get("reason"))
+    return verdicts
+
+async def run_ai_micro_batch(items):
+    # One prompt for up to AI_BATCH_SIZE products; None for any item the model skipped
+    if not model: return [None] * len(items)
+
+    listing = "\n".join(
+        f'    {i}. Product: "{item["title"]}" | Price: {item["price"]} | Reviews: {item["reviews"]}'
+        for i, item in enumerate(items)
+    )
+    prompt = f"""
+    Act as Ziva, a fraud detection AI. Check EVERY product below.
+{listing}
+    
+    {AI_RULES}
+    Respond with ONLY a JSON array, one object per product, same order, no extra text:
+    [{{"id": 0, "verdict": "SAFE or SUSPICIOUS", "reason": "one short sentence"}}]
+    """
+
+    try:
+        text = await ai_worker.generate(prompt)
+        with span("ai.parse"):
+            verdicts = parse_batch_verdicts(text, len(items))
+    except Exception as e:
+        print(f"❌ AI Batch Error: {e}")
+        verdicts = {}
+    return [verdicts.get(i) for i in range(len(items))]
+
+async def run_ai_batch(items):
+    # items: [{title, price, reviews}] -> same-order verdicts, each tagged with its cache status
+    keys = [ai_cache_key(item["title"], item["price"], item["reviews"]) for item in items]
+    results = {}
+    pending = {}
+    for key, item in zip(keys, items):
+        if key in results or key in pending: continue
+        hit, value = result_cache.get("ai", key)
+        screened = None if hit else prescreen(item["title"], item["price"], item["reviews"])
+        if hit: results[key] = dict(value, cache="hit")
+        elif screened: results[key] = dict(screened, cache="miss")
+        else: pending[key] = item
+
+    pending_keys = list(pending)
+    chunks = [pending_keys[i:i + AI_BATCH_SIZE] for i in range(0, len(pending_keys), AI_BATCH_SIZE)]
+    if chunks: print(f"🧠 AI Batch: {len(pending_keys)} products in {len(chunks)} prompts")
+    answers = await asyncio.gather(*[run_ai_micro_batch([pending[k] for k in chunk]) for chunk in chunks])
+
+    # Anything the model dropped from a batch gets a single-product retry
+    missing = [key for chunk, verdicts in zip(chunks, answers) for key, verdict in zip(chunk, verdicts) if not verdict]
+    retried = await asyncio.gather(*[
+        run_ai_analysis(pending[key]["title"], pending[key]["price"], pending[key]["reviews"]) for key in missing
+    ])
+    fresh = {key: verdict for chunk, verdicts in zip(chunks, answers) for key, verdict in zip(chunk, verdicts) if verdict}
+    fresh.update(zip(missing, retried))
+
+    for key, verdict in fresh.items():
+        if ai_cacheable(verdict):
+            result_cache.set("ai", key, verdict)
+        results[key] = dict(verdict, cache="miss")
+
+    return [dict(results[key], title=item["title"]) for key, item in zip(keys, items)]
+
 # --- CORE LOGIC: SCRAPER (From app.py) ---
 # Kept for the Website URL scanning feature
 async def scrape_product_data(url):
+    if is_amazon_url(url):
+        found = await amazon_products.lookup(url)
+        if found:
+            if found['asin'] and not asin_of(url):
+                # Short link / odd URL: tie the ASIN we read off the page to this product
+                identity.resolve(found['title'], f"https://www.amazon.in/dp/{found['asin']}")
+            return found['title'], found['price'], found['reviews']
+
     print(f"🕵️‍♂️ Deep Scanning URL: {url}")
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True, args=['--no-sandbox', '--disable-dev-shm-usage'])
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        page = await context.new_page()
+    profile = profile_for("page")
+    async with browser_pool.page(profile=profile) as page:
         await stealth_fn(page)
         
-        await page.route("**/*", lambda route: route.abort() 
-            if route.request.resource_type in ["image", "stylesheet", "font", "media"] 
-            else route.continue_())
-        
         try:
-            await page.goto(url, timeout=30000, wait_until="commit")
-            try: await page.wait_for_selector('body', timeout=5000) 
-            except: pass
+            with span("goto"):
+                await page.goto(url, timeout=30000, wait_until=profile.wait_until)
+            try:
+                with span("wait_for_selector", selector="body"):
+                    await page.wait_for_selector('body', timeout=5000)
+            except Exception: pass
             
-            data = await page.evaluate("""() => {
-                // 1. Title Extraction
-                let title = document.querySelector('#productTitle')?.innerText.trim() || 
-                            document.querySelector('h1')?.innerText.trim() || 
-                            document.querySelector('meta[property="og:title"]')?.content ||
-                            document.title;
-
-                // 2. Price Extraction
-                let price = 0;
-                // Trusted Amazon Selectors
-                const priceSelectors = [
-                    '.a-price-whole', 
-                    '#corePriceDisplay_desktop_feature_div .a-price-whole',
-                    '#apex_desktop .a-price-whole',
-                    '.a-price .a-offscreen'
-                ];
+            with span("evaluate"):
+                data = await page.evaluate("""() => {
+                    // 1. Title Extraction
+                    let title = document.querySelector('#productTitle')?.innerText.trim() || 
+                                document.querySelector('h1')?.innerText.trim() || 
+                                document.querySelector('meta[property="og:title"]')?.content ||
+                                document.title;
+
+                    // 2. Price Extraction
+                    let price = 0;
+                    // Trusted Amazon Selectors
+                    const priceSelectors = [
+                        '.a-price-whole', 
+                        '#corePriceDisplay_desktop_feature_div .a-price-whole',
+                        '#apex_desktop .a-price-whole',
+                        '.a-price .a-offscreen'
+                    ];
                 
-                for (let sel of priceSelectors) {
-                    const el = document.querySelector(sel);
-                    if (el) {
-                        let txt = el.innerText;
-                        // specific cleanup for hidden elements often containing '₹1,234.00'
-                        txt = txt.replace(/[^0-9.]/g, ''); 
-                        let val = parseFloat(txt);
-                        if (!isNaN(val) && val > 0) {
-                            price = Math.floor(val); 
-                            break;
+                    for (let sel of priceSelectors) {
+                        const el = document.querySelector(sel);
+                        if (el) {
+                            let txt = el.innerText;
+                            // specific cleanup for hidden elements often containing '₹1,234.00'
+                            txt = txt.replace(/[^0-9.]/g, ''); 
+                            let val = parseFloat(txt);
+                            if (!isNaN(val) && val > 0) {
+                                price = Math.floor(val); 
+                                break;
+                            }
                         }
                     }
-                }
-
-                // 3. Review Count Extraction
-                let reviews = 0;
-                const reviewSelectors = ['#acrCustomerReviewText', '#averageCustomerReviews .a-size-base'];
-                for (let sel of reviewSelectors) {
-                    const el = document.querySelector(sel);
-                    if (el) {
-                        let txt = el.innerText.split(' ')[0].replace(/,/g, '');
-                        let val = parseInt(txt);
-                        if (!isNaN(val)) {
-                            reviews = val;
-                            break;
+
+                    // 3. Review Count Extraction
+                    let reviews = 0;
+                    const reviewSelectors = ['#acrCustomerReviewText', '#averageCustomerReviews .a-size-base'];
+                    for (let sel of reviewSelectors) {
+                        const el = document.querySelector(sel);
+                        if (el) {
+                            let txt = el.innerText.split(' ')[0].replace(/,/g, '');
+                            let val = parseInt(txt);
+                            if (!isNaN(val)) {
+                                reviews = val;
+                                break;
+                            }
                         }
                     }
-                }
                 
-                return { title, price, reviews };
-            }""")
+                    return { title, price, reviews };
+                }""")
             
-            await browser.close()
+            if is_amazon_url(url):
+                amazon_products.remember({"title": data['title'], "price": data['price'],
+                                          "reviews": data['reviews'], "asin": asin_of(url)})
             return data['title'], data['price'], data['reviews']
         except Exception as e:
             print(f"❌ Scrape Error: {e}")
-            await browser.close()
             return None, 0, 0
 
-# --- ENDPOINTS ---
+# --- CORE LOGIC: INTEL PIPELINE ---
+# Both endpoints run the same sources (AI, one per retailer adapter, history); each goes
+# through the result cache, and cache misses for the same key are coalesced into a single run.
+def market_sites():
+    # Re-evaluated per request: adapters benched for failing/slow are left out
+    return PriceHunter.active_sites() if PriceHunter else []
+
+def cache_key(title, url=None):
+    return identity.resolve(title, url)
+
+def bulk_key(user_input):
+    # Canonical product for a bulk input: known product ID, else the retailer ID in the URL,
+    # else the URL without tracking params. Titles go through the identity table like /analyze.
+    if not is_url(user_input): return cache_key(user_input)
+    product_id, _ = identity.known(user_input)
+    if product_id: return product_id
+    ids = url_identifiers(user_input)
+    if ids: return ids[0]
+    parsed = urlparse(user_input if "://" in user_input else "https://" + user_input)
+    return f"url:{(parsed.hostname or '').removeprefix('www.')}{parsed.path.rstrip('/')}".lower()
+
+def ai_cache_key(title, price=0, reviews=0):
+    return f"{cache_key(title)}|{price}|{reviews}"
+
+async def cached_source(source, key, fetch, sources, cacheable=bool, label=None):
+    label = label or source
+    hit, value = result_cache.get(source, key)
+    if hit:
+        sources[label] = {"cache": "hit"}
+        return value
+
+    sources[label] = {"cache": "miss"}
+    value, shared = await refresh_source(source, key, fetch, cacheable)
+    sources[label]["coalesced"] = shared
+    return value
+
+async def refresh_source(source, key, fetch, cacheable=bool):
+    # Fetch (coalesced with anyone else asking) and store; used by requests and the pre-warmer
+    async def fetch_and_store():
+        value = await fetch()
+        if cacheable(value):
+            result_cache.set(source, key, value)
+        return value
+
+    return await flights.do(f"{source}:{key}", fetch_and_store)
+
+def not_stale(value):
+    # Stored prices/history served while a site blocks us are an answer, not something to cache
+    return bool(value) and not value.get('stale')
+
+def last_seen_price(site, key):
+    # While `site` blocks us: the last price we observed there, flagged stale
+    last = price_store.latest(site, key)
+    if not last: return None
+    print(f"🧱 {site}: Blocking us, serving the price we saw {(time.time() - last['observed_at']) / 3600:.1f}h ago")
+    return {"site": ADAPTERS[site].label, "title": last['title'], "price": last['price'],
+            "link": last['link'], "stale": True, "observed_at": last['observed_at']}
+
+async def fetch_site(site, query, key, match_title=None):
+    if site_guard.backing_off(site): return last_seen_price(site, key)
+    try:
+        if hunter_pool.size: found = await hunter_pool.hunt_site(site, query, match_title)
+        else: found = await PriceHunter(pool=browser_pool).hunt_site(site, query, match_title)
+    except Exception as e:
+        print(f"❌ Market Error ({site}): {e}")
+        found = None
+    if found:
+        price_store.record(site, key, found['price'], found.get('title'), found.get('link'))
+        if found.get('match', 0) >= IDENTITY_LEARN_MIN:
+            identity.learn(key, found.get('title'), found.get('link'))
+        return found
+    # This very hunt may have run into the block
+    if site_guard.backing_off(site): return last_seen_price(site, key)
+    return None
+
+async def fetch_history(query, key, match_title=None):
+    # Our own observation series first; the third-party scrape only when we lack coverage
+    own = price_store.summary(key)
+    if own:
+        print(f"📒 History: Served from our own {own['observations']} observations")
+        return own
+    if site_guard.backing_off("pricehistory"):
+        # Thin coverage beats nothing while the history site blocks us
+        own = price_store.summary(key, require_coverage=False)
+        if own: return dict(own, stale=True)
+    if not HistoryHunter: return None
+    try:
+        if hunter_pool.size: return await hunter_pool.get_history(query, match_title)
+        return await HistoryHunter(pool=browser_pool).get_history(query, match_title)
+    except Exception as e:
+        print(f"❌ History Error: {e}")
+        return None
 
-@app.get("/")
-def home():
-    return {"status": "Ziva Intelligence System Online ⚡", "modules": ["AI", "Market", "History"]}
+AI_TIMED_OUT = {"verdict": "UNKNOWN", "score": 50, "reason": "AI took too long to answer."}
 
-# 1. EXTENSION ENDPOINT (From ziva-backend)
-@app.get("/analyze")
-async def analyze_product(title: str):
-    print(f"\n🔎 [EXTENSION] INVESTIGATION: {title}")
-    
-    # Task A: AI
-    ai_task = asyncio.create_task(run_ai_analysis(title))
-    
-    # Task B: Market Scanner
-    hunter_task = None
-    if PriceHunter:
-        hunter = PriceHunter()
-        hunter_task = asyncio.create_task(hunter.hunt(title)) # Use title directly, hunter cleans it
-
-    # Task C: History
-    history_task = None
-    if HistoryHunter:
-        historian = HistoryHunter()
-        history_task = asyncio.create_task(historian.get_history(title))
-    
-    ai_result = await ai_task
-    
-    competitor_data = []
-    if hunter_task:
-        try: competitor_data = await hunter_task
-        except: pass
-        
-    history_data = None
-    if history_task:
-        try: history_data = await history_task
-        except: pass
+def intel_jobs(ai_title, search_title, price, reviews, sources, budget, url=None):
+    # name -> coroutine, in the order we'd like to hear back.
+    # Every source gets its own slice of the request budget and is cancelled when it runs out.
+    key = cache_key(search_title, url)
+    ai_key = ai_cache_key(ai_title, price, reviews)
+    prewarmer.note(key, search_title)
 
+    def bounded(label, job, fallback=None):
+        return run_with_deadline(label, job, budget.deadline_for(label), sources, fallback)
+
+    jobs = {
+        "ai": bounded("ai", cached_source("ai", ai_key, lambda: run_ai_analysis(ai_title, price, reviews), sources,
+                                          cacheable=ai_cacheable),
+                      fallback=AI_TIMED_OUT),
+    }
+    for site in market_sites():
+        jobs[site] = bounded(site, cached_source("market", f"{site}|{key}", lambda site=site: fetch_site(site, search_title, key, ai_title),
+                                                 sources, cacheable=not_stale, label=site))
+    jobs["history"] = bounded("history", cached_source("history", key, lambda: fetch_history(search_title, key, ai_title), sources,
+                                                       cacheable=not_stale))
+    return jobs
+
+def prewarm_plan(key, search_title):
+    # What the background pre-warmer keeps fresh for a hot product: every retailer + history
+    jobs = [
+        {"label": site, "source": "market", "cache_key": f"{site}|{key}",
+         "refresh": lambda site=site: refresh_source("market", f"{site}|{key}",
+                                                     lambda: fetch_site(site, search_title, key), not_stale)}
+        for site in market_sites()
+    ]
+    jobs.append({"label": "history", "source": "history", "cache_key": key,
+                 "refresh": lambda: refresh_source("history", key, lambda: fetch_history(search_title, key), not_stale)})
+    return jobs
+
+prewarmer = PrewarmScheduler(result_cache, prewarm_plan)
+
+def collect_intel(values):
+    # Copies, so callers can decorate the response without touching cached values
+    competitors = [value for name, value in values.items() if name not in ("ai", "history") and value]
+    return dict(values["ai"]), competitors, values.get("history")
+
+async def gather_intel(ai_title, search_title, price=0, reviews=0, budget=None, sources=None, url=None):
+    sources = {} if sources is None else sources
+    jobs = intel_jobs(ai_title, search_title, price, reviews, sources, budget or RequestBudget(), url)
+    values = dict(zip(jobs, await asyncio.gather(*jobs.values())))
+    ai_result, competitors, history = collect_intel(values)
+    return ai_result, competitors, history, sources
+
+async def stream_intel(ai_title, search_title, price=0, reviews=0, budget=None, sources=None, url=None):
+    # Yields ("plan", [names]) first, then (name, value) in completion order,
+    # then ("done", (ai, competitors, history, sources))
+    sources = {} if sources is None else sources
+    jobs = intel_jobs(ai_title, search_title, price, reviews, sources, budget or RequestBudget(), url)
+
+    async def named(name, job):
+        return name, await job
+
+    tasks = [asyncio.create_task(named(name, job)) for name, job in jobs.items()]
+    values = {}
+    try:
+        yield "plan", list(jobs)
+        for next_done in asyncio.as_completed(tasks):
+            name, value = await next_done
+            values[name] = value
+            yield name, value
+    finally:
+        # Client went away mid-stream: don't leave hunters running for nobody
+        for task in tasks: task.cancel()
+
+    ai_result, competitors, history = collect_intel({name: values.get(name) for name in jobs})
+    yield "done", (ai_result, competitors, history, sources)
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# --- RESPONSE BUILDERS ---
+def build_analyze_response(ai_result, competitor_data, history_data, sources):
     final_response = ai_result
-    final_response["competitors"] = competitor_data or []
+    final_response["competitors"] = competitor_data
     final_response["history"] = history_data
+    final_response["sources"] = sources
     
     if competitor_data:
         best_deal = min(competitor_data, key=lambda x: x['price'])
@@ -263,36 +594,30 @@ async def analyze_product(title: str):
 
     return final_response
 
-# 2. WEBSITE ENDPOINT (From app.py)
-@app.post("/scan")
-async def scan_endpoint(request_data: dict):
-    if 'url' not in request_data: return {"error": "No input"}
-    user_input = request_data['url'].strip()
-    print(f"\nExample Scan: {user_input}")
-
+async def resolve_scan_input(user_input, budget, sources):
+    # URL or free text -> (product_title, ai_title, search_term, current_price, review_count)
     product_title = user_input
     current_price = 0
     review_count = 0
 
     if "http" in user_input or "www." in user_input:
-        t, p, r = await scrape_product_data(user_input)
+        t, p, r = await run_with_deadline("page", scrape_product_data(user_input), budget.deadline_for("page"),
+                                          sources, fallback=(None, 0, 0))
         if t: 
             product_title = t
             current_price = p
             review_count = r
     
-    # Now delegate to the unified logic similar to /analyze but handling the response format 
-    # expected by the website frontend (script.js)
-    
-    # NOTE: script.js expects: { verdict, score, reason, product, current_price, competitors, history }
-    
-    # I can actually call the same logic steps
-    ai_task = asyncio.create_task(run_ai_analysis(product_title, current_price, review_count))
-    
+    ai_title = product_title
     search_term = clean_title_for_search(product_title)
     
     # FALLBACK: If title is bad (e.g. "Amazon.in") or empty, extract from URL
     if not search_term or "Amazon" in product_title or len(search_term) < 3:
+        _, known_title = identity.known(user_input)
+        if known_title:
+            # Seen this ASIN/PID before: reuse its title so we land on the same cache entries
+            print(f"🪪 Scraper blocked. Known product: {known_title}")
+            return known_title, known_title, clean_title_for_search(known_title), current_price, review_count
         print("⚠️ Scraper blocked. Extracting title from URL...")
         fallback_title = extract_key_fields_from_url(user_input)
         if fallback_title:
@@ -300,31 +625,15 @@ async def scan_endpoint(request_data: dict):
             search_term = clean_title_for_search(product_title)
             
     print(f"cleaned search term: {search_term}")
-    
-    hunter_task = None
-    if PriceHunter:
-        hunter = PriceHunter()
-        hunter_task = asyncio.create_task(hunter.hunt(search_term))
-
-    history_task = None
-    if HistoryHunter:
-        historian = HistoryHunter()
-        history_task = asyncio.create_task(historian.get_history(search_term))
+    return product_title, ai_title, search_term, current_price, review_count
 
-    ai_result = await ai_task
-    
-    competitors = []
-    if hunter_task:
-        try: competitors = await hunter_task
-        except: pass
-        
-    history = None
-    if history_task:
-        try: history = await history_task
-        except: pass
+def build_scan_response(user_input, product_title, current_price, ai_result, competitors, history, sources):
+    # NOTE: script.js expects: { verdict, score, reason, product, current_price, competitors, history }
 
     # Frontend Logic for "Current Price" vs "Competitors"
     if "http" in user_input and current_price > 0:
+        price_store.record(urlparse(user_input).hostname or "page", cache_key(product_title, user_input), current_price,
+                           product_title, user_input)
          # Add the scratched link as a "competitor" (current store)
         competitors.insert(0, {
             "site": "This Link",
@@ -339,10 +648,210 @@ async def scan_endpoint(request_data: dict):
         "reason": ai_result['reason'],
         "product": product_title,
         "current_price": current_price,
-        "competitors": competitors or [],
-        "history": history
+        "competitors": competitors,
+        "history": history,
+        "sources": sources
+    }
+
+# --- ENDPOINTS ---
+
+@app.get("/")
+def home():
+    return {"status": "Ziva Intelligence System Online ⚡", "modules": ["AI", "Market", "History"], "browser_pool": browser_pool.stats()}
+
+@app.get("/stats")
+def stats():
+    return {
+        "browser_pool": browser_pool.stats(),
+        "hunter_pool": hunter_pool.stats() if hunter_pool.size else None,
+        "cache": result_cache.stats(),
+        "single_flight": flights.stats(),
+        "price_store": price_store.stats(),
+        "prewarm": prewarmer.stats(),
+        "ai": ai_worker.stats(),
+        "identity": identity.stats(),
+        "jobs": job_queue.stats() if job_queue else None,
+        "site_guard": site_guard.stats(),
+        "retailers": {name: adapter.health.stats() for name, adapter in ADAPTERS.items()},
     }
 
+# Prometheus scrape target: latency histograms per request/source/stage + scraper counters
+metrics.gauge("ziva_browser_active_pages", "Pages currently open in the shared Chromium.",
+              lambda: browser_pool.stats()["active_pages"])
+metrics.gauge("ziva_hunter_in_flight", "Hunts running in each hunter process.",
+              lambda: {(("slot", str(w["slot"])),): w["in_flight"] for w in hunter_pool.stats()["workers"]})
+metrics.gauge("ziva_hunter_restarts", "Hunter processes restarted after dying.", lambda: hunter_pool.restarts)
+metrics.gauge("ziva_ai_in_flight", "Gemini calls running right now.", lambda: ai_worker.active)
+metrics.gauge("ziva_ai_waiting", "Gemini calls waiting for a slot.", lambda: ai_worker.waiting)
+metrics.gauge("ziva_single_flight_in_flight", "Distinct lookups currently running.",
+              lambda: flights.stats()["in_flight"])
+metrics.gauge("ziva_retailer_enabled", "1 while a retailer adapter is healthy, 0 while benched.",
+              lambda: {(("retailer", name),): int(adapter.health.stats()["enabled"]) for name, adapter in ADAPTERS.items()})
+
+metrics.gauge("ziva_site_backoff_seconds", "Seconds left before we talk to a blocking site again.",
+              lambda: {(("site", site),): info["backoff_s"] for site, info in site_guard.stats()["sites"].items()})
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Price history straight from our own observations (no scraping)
+@app.get("/history")
+def price_history(title: str, days: int = 90):
+    summary = price_store.summary(cache_key(title), days=days, require_coverage=False)
+    if not summary: return {"error": "No observations yet", "product": title}
+    return summary
+
+def client_budget(value):
+    # Validated + clamped per-request budget from the client; 422 on junk
+    try: return parse_budget(value)
+    except ValueError as e: raise HTTPException(status_code=422, detail=str(e))
+
+# 1. EXTENSION ENDPOINT (From ziva-backend)
+@app.get("/analyze")
+async def analyze_product(title: str, budget: float = None):
+    budget = client_budget(budget)
+    print(f"\n🔎 [EXTENSION] INVESTIGATION: {title}")
+    
+    # Use title directly for every source, the hunters clean it themselves
+    ai_result, competitor_data, history_data, sources = await gather_intel(title, title, budget=RequestBudget(budget))
+    return build_analyze_response(ai_result, competitor_data, history_data, sources)
+
+@app.get("/analyze/stream")
+async def analyze_stream(title: str, budget: float = None):
+    budget = client_budget(budget)
+    print(f"\n🔎 [EXTENSION] STREAMING INVESTIGATION: {title}")
+
+    async def events():
+        async for name, value in stream_intel(title, title, budget=RequestBudget(budget)):
+            if name == "done":
+                yield sse_event("final", build_analyze_response(*value))
+            else:
+                yield sse_event(name, value)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+# Many products at once (search-results page, wishlist): {"items": [{title, price, reviews}]} or {"titles": [...]}
+@app.post("/analyze/batch")
+async def analyze_batch(request_data: dict):
+    raw = request_data.get('items') or [{"title": t} for t in request_data.get('titles', [])]
+    items = []
+    for entry in raw[:AI_BATCH_MAX_ITEMS]:
+        if isinstance(entry, str): entry = {"title": entry}
+        if not isinstance(entry, dict): continue
+        title = str(entry.get('title') or "").strip()
+        if not title: continue
+        # Extension scrapes send "₹1,499" / "2,310 ratings" as often as numbers
+        items.append({"title": title, "price": int(parse_price(entry.get('price')) or 0),
+                      "reviews": int(parse_price(entry.get('reviews')) or 0)})
+    if not items: return {"error": "No input"}
+
+    print(f"\n🧾 [BATCH] {len(items)} products")
+    results = await run_ai_batch(items)
+    return {"count": len(results), "truncated": len(raw) > AI_BATCH_MAX_ITEMS, "results": results}
+
+# 2. WEBSITE ENDPOINT (From app.py)
+async def run_scan(user_input, budget_seconds=None):
+    budget = RequestBudget(budget_seconds)
+    sources = {}
+
+    product_title, ai_title, search_term, current_price, review_count = await resolve_scan_input(user_input, budget, sources)
+    ai_result, competitors, history, sources = await gather_intel(
+        ai_title, search_term, current_price, review_count, budget=budget, sources=sources, url=user_input
+    )
+    return build_scan_response(user_input, product_title, current_price, ai_result, competitors, history, sources)
+
+async def run_job(job):
+    # What a worker does with a claimed job (see job_queue.ScanWorker)
+    if job["kind"] == "scan":
+        return await run_scan(job["payload"]["url"], job["payload"].get("budget"))
+    raise ValueError(f"Unknown job kind: {job['kind']}")
+
+@app.post("/scan")
+async def scan_endpoint(request_data: dict):
+    if 'url' not in request_data: return {"error": "No input"}
+    user_input = request_data['url'].strip()
+    budget = client_budget(request_data.get('budget'))
+
+    if job_queue:
+        callback = request_data.get('callback')
+        if callback:
+            try: await asyncio.to_thread(check_callback, str(callback))
+            except ValueError as e: return {"error": str(e)}
+        # SQLite calls off the event loop: a busy queue file must not stall every other request
+        job_id = await asyncio.to_thread(job_queue.submit, "scan", {"url": user_input, "budget": budget}, callback)
+        print(f"\n📥 Queued Scan {job_id}: {user_input}")
+        return {"job_id": job_id, "status": "queued", "poll": f"/jobs/{job_id}"}
+
+    print(f"\nExample Scan: {user_input}")
+    return await run_scan(user_input, budget)
+
+BULK_MAX_ITEMS = int(os.getenv("ZIVA_BULK_MAX_ITEMS", "1000"))
+
+@app.post("/scan/bulk")
+async def scan_bulk(request: Request, checkpoint: str = None, budget: float = None):
+    # JSON {"items": [...], "checkpoint", "budget"}, or a raw CSV / JSONL upload with the
+    # options as query params. Streams NDJSON as products finish (always inline, even in job mode).
+    content_type = request.headers.get("content-type", "")
+    body = await request.body()
+    try:
+        if "ndjson" in content_type or "jsonl" in content_type:
+            items = parse_items(body, "jsonl")
+        elif "json" in content_type:
+            data = json.loads(body or b"{}")
+            if isinstance(data, dict):
+                checkpoint = data.get('checkpoint', checkpoint)
+                budget = data.get('budget', budget)
+                data = data.get('items') or []
+            items = parse_items(data if isinstance(data, list) else [])
+        else:
+            items = parse_items(body, "csv" if "csv" in content_type else None)
+    except (ValueError, UnicodeDecodeError) as e:
+        return {"error": f"Could not read the items: {e}"}
+    if not items: return {"error": "No input"}
+    budget = client_budget(budget)
+    if len(items) > BULK_MAX_ITEMS: return {"error": f"At most {BULK_MAX_ITEMS} items per request"}
+
+    print(f"\n📦 [BULK] {len(items)} items")
+    bulk = BulkScan(lambda user_input: run_scan(user_input, budget), bulk_key, checkpoint=checkpoint_path(checkpoint))
+
+    async def lines():
+        async for line in bulk.run(items):
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=SSE_HEADERS)
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    if not job_queue: return {"error": "Job mode is off (set ZIVA_JOB_MODE=1)"}
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if not job: raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+# GET so the website can consume it with a plain EventSource
+@app.get("/scan/stream")
+async def scan_stream(url: str, budget: float = None):
+    user_input = url.strip()
+    budget = client_budget(budget)
+    print(f"\nStreaming Scan: {user_input}")
+
+    async def events():
+        request_budget = RequestBudget(budget)
+        sources = {}
+        product_title, ai_title, search_term, current_price, review_count = await resolve_scan_input(
+            user_input, request_budget, sources
+        )
+        yield sse_event("product", {"product": product_title, "current_price": current_price})
+
+        async for name, value in stream_intel(ai_title, search_term, current_price, review_count,
+                                              budget=request_budget, sources=sources, url=user_input):
+            if name == "done":
+                yield sse_event("final", build_scan_response(user_input, product_title, current_price, *value))
+            else:
+                yield sse_event(name, value)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,61 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.standin import FIXTURES, load_fixture
+from fast_fetch import select_cards, soup_of, text_blocks
+from retailers import ADAPTERS
+from history_hunter import HistoryHunter, parse_history_text
+from product_match import ProductMatcher
+from amazon_product import parse_product
+
+# --- EXTRACTOR REGRESSION CHECK ---
+# Runs the HTTP-path extractors over the recorded pages and compares with expected.json.
+# Exit code 1 on any mismatch, so it can gate a deploy:  python -m bench.check_extractors
+
+
+def check_market(case):
+    adapter = ADAPTERS[case["site"]]
+    raw = load_fixture(case["fixture"]).decode()
+    if case["fixture"].endswith(".json"):
+        cards = adapter.parse_api(json.loads(raw))
+    else:
+        cards = select_cards(raw, adapter.card_selector, adapter.title_selector, adapter.price_selector, adapter.link_selector)
+    found = adapter.pick(case["query"], cards) or {}
+    return {"cards": len(cards), "title": found.get("title"), "price": found.get("price")}
+
+def check_product(case):
+    return parse_product(load_fixture(case["fixture"]).decode())
+
+def check_history(case):
+    hunter = HistoryHunter()
+    hunter.matcher = ProductMatcher(case["query"], min_score=50)
+    links = [{"title": a.get_text(" ", strip=True), "link": a.get("href")}
+             for a in soup_of(load_fixture(case["search"]).decode()).select('a[href*="/product/"]')]
+    blocks = text_blocks(load_fixture(case["product"]).decode(), "lowest price is", "average")
+    history = (parse_history_text(blocks[0]) if blocks else None) or {}
+    return {"link": hunter.pick_product(links), "lowest": history.get("lowest"), "average": history.get("average")}
+
+def main():
+    with open(os.path.join(FIXTURES, "expected.json")) as f:
+        expected = json.load(f)
+
+    failures = 0
+    for kind, check in (("market", check_market), ("product", check_product), ("history", check_history)):
+        for case in expected[kind]:
+            got = check(case)
+            wrong = {field: (case[field], value) for field, value in got.items() if case.get(field) != value}
+            name = f"{kind}:{case.get('site', 'pricehistory')} '{case['query']}'" if "query" in case else f"{kind}:{case['fixture']}"
+            if wrong:
+                failures += 1
+                print(f"❌ {name}: " + ", ".join(f"{k} expected {want!r}, got {have!r}" for k, (want, have) in wrong.items()))
+            else:
+                print(f"✅ {name}")
+
+    print(f"\n{'All extractors OK' if not failures else f'{failures} extractor check(s) failed'}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.standin import StandIn
+from bench.stub_model import StubModel
+
+# --- OFFLINE BENCHMARK ---
+# Drives /analyze and /scan in-process against the recorded pages (bench/standin.py) and a
+# stubbed Gemini, then reports throughput, p50/p95/p99 latency, peak RSS and Chromium count.
+#
+#   python -m bench.run --requests 200 --concurrency 16 --site-latency 150 --ai-latency 800
+
+ANALYZE_TITLES = [
+    "OnePlus 13R 5G (Nebula Noir, 256 GB)",
+    "Apple iPhone 15 (Black, 128 GB)",
+    "XQZRTK 16TB Portable SSD External Solid State Drive USB 3.1",
+]
+SCAN_PATHS = [
+    "/amazon/OnePlus-Nebula-Noir-256GB-Storage/dp/B0DPS62DYH",
+    "/amazon/Apple-iPhone-15-128-GB/dp/B0CHX1W1XY",
+]
+
+
+# --- PROCESS SAMPLING (Linux /proc; falls back to our own peak RSS elsewhere) ---
+def _children_of(root_pid):
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit(): continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            parents.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(parents.get(pid, []))
+    return tree
+
+def _rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"): return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+def _is_browser(pid):
+    try:
+        with open(f"/proc/{pid}/comm") as f: return "chrom" in f.read()
+    except OSError:
+        return False
+
+def sample_processes():
+    # (RSS of us + every child process in MB, Chromium processes)
+    if not os.path.isdir("/proc"):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 0
+    tree = _children_of(os.getpid())
+    return sum(_rss_kb(pid) for pid in tree) / 1024, sum(1 for pid in tree if _is_browser(pid))
+
+
+class Sampler:
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak_rss_mb = 0.0
+        self.peak_browsers = 0
+
+    async def run(self):
+        while True:
+            rss, browsers = sample_processes()
+            self.peak_rss_mb = max(self.peak_rss_mb, rss)
+            self.peak_browsers = max(self.peak_browsers, browsers)
+            await asyncio.sleep(self.interval)
+
+
+# --- LOAD ---
+def summarize(latencies, errors, wall):
+    from price_store import percentile
+    ordered = sorted(latencies)
+    ms = lambda pct: round(percentile(ordered, pct) * 1000, 1) if ordered else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+        "p50_ms": ms(50), "p95_ms": ms(95), "p99_ms": ms(99),
+        "max_ms": round(ordered[-1] * 1000, 1) if ordered else None,
+    }
+
+async def drive(client, endpoint, count, concurrency, site_root, budget):
+    latencies, errors, source_ms = [], 0, {}
+    queue = asyncio.Queue()
+    for i in range(count): queue.put_nowait(i)
+
+    async def one(i):
+        if endpoint == "analyze":
+            params = {"title": ANALYZE_TITLES[i % len(ANALYZE_TITLES)]}
+            if budget: params["budget"] = budget
+            return await client.get("/analyze", params=params)
+        body = {"url": site_root + SCAN_PATHS[i % len(SCAN_PATHS)]}
+        if budget: body["budget"] = budget
+        return await client.post("/scan", json=body)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            i = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                response = await one(i)
+                data = response.json()
+                if response.status_code != 200 or "error" in data: errors += 1
+                for name, meta in (data.get("sources") or {}).items():
+                    if "ms" in meta: source_ms.setdefault(name, []).append(meta["ms"] / 1000)
+            except Exception as e:
+                print(f"❌ {endpoint} #{i}: {e}")
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - started
+
+    report = summarize(latencies, errors, wall)
+    report["sources_p50_ms"] = {name: summarize(values, 0, 0)["p50_ms"] for name, values in sorted(source_ms.items())}
+    return report
+
+
+async def main(args):
+    standin = StandIn(latency=args.site_latency / 1000).start()
+    workdir = tempfile.mkdtemp(prefix="ziva-bench-")
+
+    # Everything the app reads at import time has to be set before importing it
+    os.environ["ZIVA_SITE_ROOT"] = standin.url
+    os.environ["ZIVA_RETAILERS"] = args.retailers
+    os.environ["ZIVA_PRICE_DB"] = os.path.join(workdir, "prices.sqlite")
+    os.environ["ZIVA_IDENTITY_DB"] = os.path.join(workdir, "ids.sqlite")
+    os.environ["ZIVA_HUNTER_PROCESSES"] = str(args.hunter_processes)
+    os.environ["ZIVA_SITE_RATE"] = str(args.site_rate)
+    os.environ["ZIVA_SITE_BURST"] = str(max(1, args.site_rate * 2))
+    os.environ.pop("GEMINI_API_KEY", None)
+    os.environ.pop("ZIVA_CACHE_DB", None)
+
+    import httpx
+    import app as ziva
+
+    stub = StubModel(latency=args.ai_latency / 1000)
+    ziva.model = stub
+    ziva.ai_worker.model = stub
+    if args.cold:
+        # Every request pays for its own lookups (concurrent identical ones still coalesce)
+        ziva.result_cache.get = lambda source, key: (False, None)
+
+    sampler = Sampler()
+    sampling = asyncio.create_task(sampler.run())
+    reports = {}
+    launches, hunters = 0, None
+    try:
+        async with ziva.lifespan(ziva.app):
+            transport = httpx.ASGITransport(app=ziva.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://ziva", timeout=120) as client:
+                for endpoint in args.endpoints.split(","):
+                    print(f"🏁 {endpoint}: {args.requests} requests at concurrency {args.concurrency}")
+                    reports[endpoint] = await drive(client, endpoint.strip(), args.requests, args.concurrency,
+                                                    standin.url, args.budget)
+            launches = ziva.browser_pool.launches
+            hunters = ziva.hunter_pool.stats() if args.hunter_processes else None
+    finally:
+        sampling.cancel()
+        standin.stop()
+
+    result = {
+        "config": vars(args),
+        "endpoints": reports,
+        "peak_rss_mb": round(sampler.peak_rss_mb, 1),
+        "peak_browser_processes": sampler.peak_browsers,
+        "browser_launches": launches,
+        "hunter_pool": hunters,
+        "ai_calls": stub.calls,
+        "standin_hits": dict(standin.hits),
+    }
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, "w") as f: json.dump(result, f, indent=2)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline /analyze + /scan benchmark")
+    parser.add_argument("--endpoints", default="analyze,scan", help="comma-separated: analyze, scan")
+    parser.add_argument("--requests", type=int, default=60, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--site-latency", type=float, default=150, help="ms added to every stand-in response")
+    parser.add_argument("--ai-latency", type=float, default=800, help="ms per stub Gemini call")
+    parser.add_argument("--retailers", default="flipkart,amazon,reliance,vijaysales,croma")
+    parser.add_argument("--budget", type=float, default=None, help="per-request budget in seconds")
+    parser.add_argument("--hunter-processes", type=int, default=0, help="run hunts in N child processes")
+    parser.add_argument("--site-rate", type=float, default=1000,
+                        help="per-site requests/second for the site guard (the stand-in never blocks)")
+    parser.add_argument("--cold", action="store_true", help="bypass the result cache")
+    parser.add_argument("--json", help="also write the report to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+import os
+import re
+import time
+import argparse
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# --- LOCAL STAND-IN FOR THE RETAILERS ---
+# Serves the recorded pages in bench/fixtures under /<site>/..., so the app can run with
+# ZIVA_SITE_ROOT=http://127.0.0.1:<port> and never touch a real retailer.
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# (path pattern, fixture). First match wins; anything else is a 404 like a dead search page.
+ROUTES = [
+    (r'^/flipkart/search', "flipkart_search.html"),
+    (r'^/amazon/s$', "amazon_search.html"),
+    (r'^/amazon/(.+/)?(dp|gp/product)/B0CHX1W1XY', "amazon_product_ld.html"),
+    (r'^/amazon/(.+/)?(dp|gp/product)/', "amazon_product.html"),
+    (r'^/croma/?$', "croma_home.html"),
+    (r'^/croma/api/searchservices/', "croma_api.json"),
+    (r'^/croma/search', "croma_search.html"),
+    (r'^/reliance/search', "reliance_search.html"),
+    (r'^/vijaysales/search-listing', "vijaysales_search.html"),
+    (r'^/pricehistory/search', "pricehistory_search.html"),
+    (r'^/pricehistory/product/', "pricehistory_product.html"),
+]
+ROUTES = [(re.compile(pattern), fixture) for pattern, fixture in ROUTES]
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+class StandIn:
+    # latency: seconds added to every response, roughly what a real retailer takes
+    def __init__(self, port=0, latency=0.0):
+        self.latency = latency
+        self.hits = Counter()
+        self._pages = {fixture: load_fixture(fixture) for _, fixture in ROUTES}
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                fixture = next((f for pattern, f in ROUTES if pattern.search(path)), None)
+                standin.hits[fixture or "404"] += 1
+                if standin.latency: time.sleep(standin.latency)
+                if not fixture:
+                    self.send_error(404)
+                    return
+                body = standin._pages[fixture]
+                self.send_response(200)
+                kind = "application/json" if fixture.endswith(".json") else "text/html; charset=utf-8"
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded retailer pages locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0, help="ms added to every response")
+    args = parser.parse_args()
+
+    standin = StandIn(args.port, args.latency / 1000).start()
+    print(f"🧪 Stand-in: {standin.url} (run the app with ZIVA_SITE_ROOT={standin.url})")
+    try: threading.Event().wait()
+    except KeyboardInterrupt: standin.stop()
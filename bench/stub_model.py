@@ -0,0 +1,32 @@
+import re
+import json
+import random
+import asyncio
+
+# --- STUB GEMINI ---
+# Same surface AIWorker uses (generate_content_async -> .text), answering in the formats
+# app.py parses, after a configurable delay. Lets the benchmark include "AI time" offline.
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    def __init__(self, latency=0.8, jitter=0.2):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+
+    def answer(self, prompt):
+        # Batch prompts list "N. Product: ..." lines and want a JSON array back
+        if "JSON array" in prompt:
+            ids = [int(n) for n in re.findall(r'^\s*(\d+)\. Product:', prompt, re.M)]
+            return json.dumps([{"id": i, "verdict": "SAFE", "reason": "Stub verdict."} for i in ids])
+        return "SAFE | Stub verdict: specs and price look consistent."
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(max(0.0, self.latency * random.uniform(1 - self.jitter, 1 + self.jitter)))
+        return StubResponse(self.answer(prompt))
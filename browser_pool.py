@@ -0,0 +1,146 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from telemetry import span
+
+# Real User Agent is critical for Croma (and keeps Amazon calmer)
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+LAUNCH_ARGS = ['--no-sandbox', '--disable-dev-shm-usage']
+
+
+class _BrowserSlot:
+    # One launched Chromium + bookkeeping so we know when it is safe to close it
+    def __init__(self, browser):
+        self.browser = browser
+        self.active = 0
+        self.served = 0
+        self.retired = False
+        self.crashed = False
+        browser.on("disconnected", lambda _: self._mark_crashed())
+
+    def _mark_crashed(self):
+        self.crashed = True
+
+
+# One long-lived Chromium shared by every hunter.
+# Each borrower gets its own isolated context + page, concurrency is capped,
+# and the browser is recycled after `recycle_after` pages or when it crashes.
+class BrowserPool:
+    def __init__(self, max_pages=None, recycle_after=None, headless=True):
+        self.max_pages = max_pages or int(os.getenv("ZIVA_POOL_MAX_PAGES", "6"))
+        self.recycle_after = recycle_after or int(os.getenv("ZIVA_POOL_RECYCLE_AFTER", "200"))
+        self.headless = headless
+
+        self._playwright = None
+        self._slot = None
+        self._semaphore = asyncio.Semaphore(self.max_pages)
+        self._lock = asyncio.Lock()
+        self.launches = 0
+
+    # --- LIFECYCLE ---
+    async def start(self):
+        if self._playwright: return self
+        self._playwright = await async_playwright().start()
+        print(f"🌐 Browser Pool: Online (max {self.max_pages} pages, recycle every {self.recycle_after})")
+        return self
+
+    async def stop(self):
+        async with self._lock:
+            slot, self._slot = self._slot, None
+        if slot:
+            try: await slot.browser.close()
+            except Exception: pass
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        print("🌐 Browser Pool: Offline")
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    # --- BROWSER MANAGEMENT ---
+    async def _launch(self):
+        with span("browser.launch"):
+            browser = await self._playwright.chromium.launch(headless=self.headless, args=LAUNCH_ARGS)
+        self.launches += 1
+        return _BrowserSlot(browser)
+
+    async def _checkout_slot(self):
+        async with self._lock:
+            if not self._playwright:
+                await self.start()
+
+            slot = self._slot
+            if slot and (slot.crashed or not slot.browser.is_connected()):
+                print("💥 Browser Pool: Chromium crashed, relaunching...")
+                slot.retired = True
+                self._slot = slot = None
+            elif slot and slot.served >= self.recycle_after:
+                print(f"♻️ Browser Pool: Recycling Chromium after {slot.served} pages")
+                slot.retired = True
+                if slot.active == 0:
+                    asyncio.create_task(self._close_slot(slot))
+                self._slot = slot = None
+
+            if slot is None:
+                self._slot = slot = await self._launch()
+
+            slot.active += 1
+            slot.served += 1
+            return slot
+
+    async def _release_slot(self, slot):
+        slot.active -= 1
+        if slot.retired and slot.active == 0:
+            await self._close_slot(slot)
+
+    async def _close_slot(self, slot):
+        try: await slot.browser.close()
+        except Exception: pass
+
+    # --- PUBLIC API ---
+    @asynccontextmanager
+    async def page(self, user_agent=DEFAULT_USER_AGENT, profile=None, **context_kwargs):
+        # profile: a page_profile.PageProfile deciding what the page may download
+        if profile: context_kwargs.setdefault("service_workers", "block")
+        async with self._semaphore:
+            slot = await self._checkout_slot()
+            context = None
+            traffic = None
+            try:
+                with span("browser.new_page"):
+                    context = await slot.browser.new_context(user_agent=user_agent, **context_kwargs)
+                    page = await context.new_page()
+                    if profile: traffic = await profile.apply(page)
+                yield page
+            finally:
+                if traffic:
+                    try: await traffic.settle()
+                    except Exception: pass
+                if context:
+                    try: await context.close()
+                    except Exception: pass
+                await self._release_slot(slot)
+
+    def stats(self):
+        return {
+            "max_pages": self.max_pages,
+            "launches": self.launches,
+            "active_pages": self._slot.active if self._slot else 0,
+            "served_by_current": self._slot.served if self._slot else 0,
+        }
+
+
+@asynccontextmanager
+async def borrow_pool(pool=None, max_pages=None):
+    # Use the shared pool when we have one, otherwise spin up a throwaway one
+    # (used by the __main__ test blocks and by anyone calling a hunter directly).
+    if pool:
+        yield pool
+        return
+    async with BrowserPool(max_pages=max_pages) as own_pool:
+        yield own_pool
@@ -0,0 +1,49 @@
+import sys
+import json
+import asyncio
+import argparse
+
+# Bulk scan from the command line, same pipeline as POST /scan/bulk:
+#   python bulk.py products.csv --checkpoint audit.ndjson > results.ndjson
+# Results go to stdout (or --out) as NDJSON, progress logs to stderr. Re-run with the same
+# --checkpoint to resume; the checkpoint holds every finished product's line.
+
+# The app logs with print() (from import on): all of that goes to stderr, results to the real stdout
+RESULTS = sys.stdout
+sys.stdout = sys.stderr
+
+import app as ziva
+from bulk_scan import BulkScan, parse_items
+
+
+async def main(args):
+    with open(args.input, "rb") as f:
+        items = parse_items(f.read(), args.format)
+    if not items:
+        print("❌ Bulk: No URLs or titles in the input", file=sys.stderr)
+        return 1
+
+    bulk = BulkScan(lambda user_input: ziva.run_scan(user_input, args.budget), ziva.bulk_key,
+                    concurrency=args.concurrency, per_domain=args.per_domain, checkpoint=args.checkpoint)
+    out = open(args.out, "w", encoding="utf-8") if args.out else RESULTS
+    try:
+        async with ziva.lifespan(ziva.app):
+            async for line in bulk.run(items):
+                out.write(json.dumps(line, ensure_ascii=False) + "\n")
+                out.flush()
+    finally:
+        if out is not RESULTS: out.close()
+    return 1 if bulk.counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan a CSV/JSONL list of product URLs or titles")
+    parser.add_argument("input", help="CSV (url/title column or first column) or JSONL file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: guessed from the content")
+    parser.add_argument("--checkpoint", help="NDJSON file to append results to and resume from")
+    parser.add_argument("--out", help="write results here instead of stdout")
+    parser.add_argument("--concurrency", type=int, default=None, help="products scanned at once")
+    parser.add_argument("--per-domain", type=int, default=None, help="product pages open at once per site")
+    parser.add_argument("--budget", type=float, default=None, help="per-product budget in seconds")
+    try: sys.exit(asyncio.run(main(parser.parse_args())))
+    except KeyboardInterrupt: sys.exit(130)
@@ -0,0 +1,131 @@
+import os
+import io
+import re
+import csv
+import json
+import time
+import asyncio
+from contextlib import nullcontext
+from collections import defaultdict
+from urllib.parse import urlparse
+
+# --- BULK SCANS ---
+# Hundreds of URLs/titles in one go (POST /scan/bulk, bulk.py). Inputs that point at the same
+# product are scanned once, product pages are opened at most `per_domain` at a time per site,
+# and every result is streamed back (and appended to the checkpoint file) as soon as it's done.
+# Re-running with the same checkpoint skips products it already holds.
+
+INPUT_FIELDS = ("url", "title", "input", "product", "link")
+BULK_DIR = os.getenv("ZIVA_BULK_DIR", "bulk_runs")
+
+
+def is_url(text):
+    # Same test /scan uses to decide between scraping a page and searching a title
+    return "http" in text or "www." in text
+
+def domain_of(text):
+    if not is_url(text): return None
+    host = urlparse(text if "://" in text else "https://" + text).hostname or ""
+    return host.lower().removeprefix("www.") or None
+
+def _field(row):
+    if isinstance(row, dict):
+        return next((row[f] for f in INPUT_FIELDS if isinstance(row.get(f), str) and row[f].strip()), "")
+    return row if isinstance(row, str) else ""
+
+def parse_items(data, fmt=None):
+    # JSON list / CSV / JSONL -> input strings. CSV: a url/title column if there's a header,
+    # else the first column. JSONL: one string or {"url"/"title": ...} per line.
+    if isinstance(data, list):
+        rows = data
+    else:
+        text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+        if not fmt:
+            fmt = "jsonl" if text.lstrip()[:1] in ('{', '"') else "csv"
+        if fmt == "jsonl":
+            rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            table = [row for row in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in row)]
+            header = [cell.strip().lower() for cell in table[0]] if table else []
+            column = next((header.index(f) for f in INPUT_FIELDS if f in header), None)
+            if column is None: column = 0
+            else: table = table[1:]
+            rows = [row[column] if column < len(row) else "" for row in table]
+    return [item.strip() for item in map(_field, rows) if item.strip()]
+
+def checkpoint_path(name):
+    # API callers name a checkpoint, they don't pick a path on our disk
+    name = re.sub(r"[^A-Za-z0-9_.-]", "", name or "").lstrip(".")
+    if not name: return None
+    os.makedirs(BULK_DIR, exist_ok=True)
+    return os.path.join(BULK_DIR, name if name.endswith(".ndjson") else name + ".ndjson")
+
+
+class BulkScan:
+    def __init__(self, scan, key_of, concurrency=None, per_domain=None, checkpoint=None):
+        self.scan = scan      # async (input) -> /scan response dict
+        self.key_of = key_of  # input -> canonical product key (dedupe + checkpoint)
+        self.concurrency = concurrency or int(os.getenv("ZIVA_BULK_CONCURRENCY", "8"))
+        self.per_domain = per_domain or int(os.getenv("ZIVA_BULK_PER_DOMAIN", "2"))
+        self.checkpoint = checkpoint
+        self.counts = {"done": 0, "failed": 0, "resumed": 0}
+
+    def _finished_keys(self):
+        # Failed products are retried on resume, finished ones are not
+        if not self.checkpoint or not os.path.exists(self.checkpoint): return set()
+        keys = set()
+        with open(self.checkpoint, encoding="utf-8") as f:
+            for line in f:
+                try: entry = json.loads(line)
+                except ValueError: continue  # torn last line from a killed run
+                if entry.get("status") == "done": keys.add(entry.get("key"))
+        return keys
+
+    def _record(self, line):
+        if not self.checkpoint: return
+        with open(self.checkpoint, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+    async def run(self, items):
+        # Async generator of NDJSON lines: one "start", one "result" per product, one "done"
+        started = time.perf_counter()
+        products = {}  # key -> every input that resolved to it, first-seen order
+        for item in items:
+            products.setdefault(self.key_of(item), []).append(item)
+        finished = self._finished_keys()
+        todo = [(key, inputs) for key, inputs in products.items() if key not in finished]
+        self.counts["resumed"] = len(products) - len(todo)
+        yield {"event": "start", "items": len(items), "products": len(products), "resumed": self.counts["resumed"]}
+
+        slots = asyncio.Semaphore(self.concurrency)
+        domains = defaultdict(lambda: asyncio.Semaphore(self.per_domain))
+        done = asyncio.Queue()
+
+        async def one(key, inputs):
+            first = inputs[0]
+            domain = domain_of(first)
+            # Domain first, so a product waiting on a busy site doesn't hold a global slot
+            async with (domains[domain] if domain else nullcontext()):
+                async with slots:
+                    scan_started = time.perf_counter()
+                    try:
+                        result = await self.scan(first)
+                        status = "failed" if "error" in result else "done"
+                    except Exception as e:
+                        result, status = {"error": str(e) or e.__class__.__name__}, "failed"
+            await done.put({"event": "result", "key": key, "inputs": inputs, "status": status,
+                            "ms": round((time.perf_counter() - scan_started) * 1000), "result": result})
+
+        tasks = [asyncio.create_task(one(key, inputs)) for key, inputs in todo]
+        try:
+            for _ in tasks:
+                line = await done.get()
+                self.counts[line["status"]] += 1
+                self._record(line)
+                yield line
+        finally:
+            # Client went away / CLI interrupted: the checkpoint lets the next run pick up here
+            for task in tasks: task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        yield {"event": "done", **self.counts, "seconds": round(time.perf_counter() - started, 1)}
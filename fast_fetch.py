@@ -0,0 +1,145 @@
+import os
+import json
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+from browser_pool import DEFAULT_USER_AGENT
+from telemetry import span
+from site_guard import site_guard
+
+# --- FAST PATH: plain HTTP + HTML/JSON parsing, no browser ---
+# Many search/result pages are server-rendered, so a keep-alive GET + BeautifulSoup
+# gets the same cards Chromium would, for a fraction of the CPU, RAM and time.
+
+# Serve every site from one local stand-in instead of the real domains (bench/standin.py):
+# ZIVA_SITE_ROOT=http://127.0.0.1:8765 -> https://www.flipkart.com becomes http://127.0.0.1:8765/flipkart
+SITE_ROOT = os.getenv("ZIVA_SITE_ROOT", "").rstrip("/")
+
+def site_url(name, default):
+    return f"{SITE_ROOT}/{name}" if SITE_ROOT else default
+
+HEADERS = {
+    "User-Agent": DEFAULT_USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IN,en;q=0.9",
+}
+
+
+class HttpClient:
+    # requests.Session (pooled keep-alive connections) driven from asyncio through a
+    # bounded thread pool, so lookups never block the event loop.
+    def __init__(self, pool_size=None, timeout=None):
+        self.pool_size = pool_size or int(os.getenv("ZIVA_HTTP_POOL_SIZE", "16"))
+        self.timeout = timeout or float(os.getenv("ZIVA_HTTP_TIMEOUT", "6"))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(HEADERS)
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="ziva-http")
+
+    async def get(self, url, timeout=None, **kwargs):
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self.session.get, url, timeout=timeout or self.timeout, **kwargs)
+        with span("http.get"):
+            return await loop.run_in_executor(self._executor, call)
+
+    async def get_text(self, url, timeout=None, site=None, **kwargs):
+        # Body on 200, None on anything else (callers fall back to the browser).
+        # With `site`: rate-limited per site, and SiteBlocked on backoff / 403 / 429 / 503.
+        if site: await site_guard.acquire(site)
+        try:
+            response = await self.get(url, timeout=timeout, **kwargs)
+        except requests.RequestException as e:
+            print(f"⚡ Fast path failed for {url}: {e}")
+            return None
+        if response.status_code != 200:
+            print(f"⚡ Fast path got HTTP {response.status_code} for {url}")
+            if site: site_guard.check_status(site, response.status_code)
+            return None
+        return response.text
+
+    async def get_json(self, url, timeout=None, **kwargs):
+        text = await self.get_text(url, timeout=timeout, **kwargs)
+        if not text: return None
+        try: return json.loads(text)
+        except ValueError: return None
+
+    async def post_json(self, url, body, timeout=None):
+        # Webhook-style POST; raises on network errors and non-2xx answers.
+        # No redirects: the URL was vetted (job_queue.check_callback), wherever it points next was not.
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self.session.post, url, json=body, timeout=timeout or self.timeout, allow_redirects=False)
+        response = await loop.run_in_executor(self._executor, call)
+        response.raise_for_status()
+        return response
+
+    def close(self):
+        self.session.close()
+        self._executor.shutdown(wait=False)
+
+
+# One client per process, shared by every adapter
+http_client = HttpClient()
+
+
+# --- PARSERS ---
+def soup_of(html):
+    return BeautifulSoup(html, "html.parser")
+
+def select_cards(html, card_selector, title_selector, price_selector, link_selector="a"):
+    # Same contract as the in-page JS: [{title, price, link}] for every complete card
+    cards = []
+    for el in soup_of(html).select(card_selector):
+        title_el = el.select_one(title_selector)
+        price_el = el.select_one(price_selector)
+        if not (title_el and price_el): continue
+        link_el = el.select_one(link_selector) if link_selector else None
+        cards.append({
+            "title": title_el.get_text(" ", strip=True),
+            "price": price_el.get_text(" ", strip=True),
+            "link": link_el.get("href") if link_el else None,
+        })
+    return cards
+
+def text_blocks(html, *needles):
+    # Smallest text blocks (p/div/span) that mention every needle - mirrors the in-page lookup
+    hits = []
+    for el in soup_of(html).select("p, div, span"):
+        text = el.get_text(" ", strip=True)
+        if all(n in text for n in needles):
+            hits.append(text)
+    return sorted(hits, key=len)
+
+def json_ld(soup):
+    # Every JSON-LD node on the page, flattened out of lists and @graph wrappers
+    nodes = []
+    for script in soup.select('script[type="application/ld+json"]'):
+        try: data = json.loads(script.string or script.get_text() or "")
+        except ValueError: continue
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                stack.extend(reversed(item))
+            elif isinstance(item, dict):
+                nodes.append(item)
+                if isinstance(item.get("@graph"), list): stack.extend(reversed(item["@graph"]))
+    return nodes
+
+def ld_nodes_of_type(nodes, kind):
+    # "@type" may be a string or a list ("Product", ["Product", "Thing"])
+    def types(node):
+        value = node.get("@type")
+        return value if isinstance(value, list) else [value]
+    return [node for node in nodes if kind in types(node)]
+
+def meta_content(soup, *names):
+    # First non-empty <meta property=... | name=... content=...> among `names`
+    for name in names:
+        el = soup.find("meta", attrs={"property": name}) or soup.find("meta", attrs={"name": name})
+        if el and el.get("content", "").strip(): return el["content"].strip()
+    return None
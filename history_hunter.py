@@ -1,49 +1,150 @@
 import asyncio
-from playwright.async_api import async_playwright
+from urllib.parse import quote_plus
+from browser_pool import borrow_pool
+from fast_fetch import http_client, soup_of, text_blocks, site_url
+from product_match import ProductMatcher
+from page_profile import profile_for
+from telemetry import span, SCRAPES
+from site_guard import site_guard, SiteBlocked
 import re
 
+HISTORY_SITE = site_url("pricehistory", "https://pricehistoryapp.com")
+
+
+def parse_history_text(page_text):
+    # REGEX PARSING (The Magic Part)
+    # Pattern: "lowest price is 50999" ... "average and highest price are 70760"
+    lowest_match = re.search(r'lowest price is\s*₹?([\d,]+)', page_text)
+    average_match = re.search(r'average.*?price.*?₹?([\d,]+)', page_text)
+
+    lowest = 0
+    average = 0
+
+    if lowest_match:
+        lowest = int(lowest_match.group(1).replace(",", ""))
+
+    if average_match:
+        average = int(average_match.group(1).replace(",", ""))
+
+    if lowest > 0:
+        print(f"✅ Corrected History Data: Low: {lowest} | Avg: {average}")
+        return {"lowest": lowest, "average": average}
+    return None
+
+
 class HistoryHunter:
-    async def get_history(self, query):
+    def __init__(self, pool=None):
+        # Shared BrowserPool from the API lifespan; None = launch our own (CLI/testing)
+        self.pool = pool
+        self.profile = profile_for("history")
+
+    async def get_history(self, query, match_title=None):
         print(f"📉 History Hunter: Checking past prices for '{query}'...")
         # Clean query: "Apple iPhone 14 (Midnight...)" -> "Apple iPhone 14"
         clean_query = query.split("(")[0].split("|")[0].strip()
+        # ...but pick among the results using the full title, so we get the right variant
+        self.matcher = ProductMatcher(match_title or query, min_score=50)
         
-        async with async_playwright() as p:
-            # STEALTH MODE: headless=True
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            )
-            page = await context.new_page()
+        # Fast path: the search + product pages are server-rendered, try plain HTTP first
+        try:
+            history = await self._fetch_history(clean_query)
+            if history:
+                SCRAPES.inc(retailer="pricehistory", path="http", outcome="success")
+                site_guard.report_ok("pricehistory")
+                return history
+        except SiteBlocked as e:
+            # Same site behind the browser: don't open one just to meet the same wall
+            print(f"🧱 History: {e}")
+            SCRAPES.inc(retailer="pricehistory", path="http", outcome="blocked")
+            return None
+        except Exception as e:
+            print(f"⚡ History fast path error: {e}")
+
+        history = None
+        blocked = False
+        try:
+            async with borrow_pool(self.pool, max_pages=1) as pool:
+                async with pool.page(profile=self.profile) as page:
+                    history = await self._read_history(page, clean_query)
+                    if history: site_guard.report_ok("pricehistory")
+                    return history
+        except SiteBlocked as e:
+            blocked = True
+            print(f"🧱 History: {e}")
+            return None
+        finally:
+            outcome = "blocked" if blocked else "success" if history else "failure"
+            SCRAPES.inc(retailer="pricehistory", path="browser", outcome=outcome)
+
+    async def _fetch_history(self, clean_query):
+        html = await http_client.get_text(f"{HISTORY_SITE}/search?q={quote_plus(clean_query)}", site="pricehistory")
+        if not html: return None
+
+        links = [{"title": a.get_text(" ", strip=True), "link": a.get("href")}
+                 for a in soup_of(html).select('a[href*="/product/"]')]
+        product_url = self.pick_product(links)
+        if not product_url: return None
+        full_url = f"{HISTORY_SITE}{product_url}" if not product_url.startswith("http") else product_url
+
+        html = await http_client.get_text(full_url, site="pricehistory")
+        if not html: return None
+        with span("parse"):
+            blocks = text_blocks(html, "lowest price is", "average")
+            history = parse_history_text(blocks[0]) if blocks else None
+        if history: print(f"⚡ History: Served without a browser ({full_url})")
+        return history
+
+    def pick_product(self, links):
+        # Best-matching product card; falls back to the first one like we always did
+        links = [l for l in links if l.get("link")]
+        if not links: return None
+        best, confidence = self.matcher.best(links)
+        if best:
+            print(f"📍 History: Matched '{best['title']}' ({confidence:.0%})")
+            return best["link"]
+        return links[0]["link"]
+
+    async def _read_history(self, page, clean_query):
+        # Paced and block-checked like the retailer browser path; SiteBlocked goes to the caller
+        try:
+            # 1. SEARCH
+            await site_guard.acquire("pricehistory")
+            with span("goto", page="search"):
+                await page.goto(f"{HISTORY_SITE}/search?q={quote_plus(clean_query)}", timeout=20000,
+                                wait_until=self.profile.wait_until)
             
+            # 2. FIND PRODUCT LINK
             try:
-                # 1. SEARCH
-                await page.goto(f"https://pricehistoryapp.com/search?q={clean_query}", timeout=20000)
+                with span("wait_for_selector", selector="product links"):
+                    await site_guard.wait_ready(page, "pricehistory", 'a[href*="/product/"]', 8000)
+                with span("evaluate"):
+                    links = await page.eval_on_selector_all('a[href*="/product/"]', """
+                        elements => elements.map(a => ({ title: a.innerText, link: a.getAttribute('href') }))
+                    """)
+                product_url = self.pick_product(links)
                 
-                # 2. FIND PRODUCT LINK
-                try:
-                    await page.wait_for_selector('div', state="attached")
-                    # We click the first product card
-                    first_product = await page.wait_for_selector('a[href*="/product/"]', timeout=8000)
-                    
-                    if first_product:
-                        product_url = await first_product.get_attribute('href')
-                        full_url = f"https://pricehistoryapp.com{product_url}" if not product_url.startswith("http") else product_url
-                        print(f"📍 Analyzing History Page: {full_url}")
-                        await page.goto(full_url, timeout=20000)
-                    else:
-                        print("❌ History: No product links found.")
-                        await browser.close(); return None
-                except:
-                    print("❌ History: Search failed.")
-                    await browser.close(); return None
-
-                # 3. READ THE SUMMARY SENTENCE
-                # We look for the text block containing "lowest price is"
-                try:
-                    await page.wait_for_selector("text=lowest price is", timeout=10000)
-                    
-                    # Extract the full description text
+                if product_url:
+                    full_url = f"{HISTORY_SITE}{product_url}" if not product_url.startswith("http") else product_url
+                    print(f"📍 Analyzing History Page: {full_url}")
+                    await site_guard.acquire("pricehistory")
+                    with span("goto", page="product"):
+                        await page.goto(full_url, timeout=20000, wait_until=self.profile.wait_until)
+                else:
+                    print("❌ History: No product links found.")
+                    return None
+            except SiteBlocked: raise
+            except Exception:
+                print("❌ History: Search failed.")
+                return None
+
+            # 3. READ THE SUMMARY SENTENCE
+            # We look for the text block containing "lowest price is"
+            try:
+                with span("wait_for_selector", selector="text=lowest price is"):
+                    await site_guard.wait_ready(page, "pricehistory", None, 10000, text="lowest price is")
+                
+                # Extract the full description text
+                with span("evaluate"):
                     page_text = await page.evaluate("""() => {
                         // Find the paragraph that talks about price history
                         const elements = document.querySelectorAll('p, div, span');
@@ -54,41 +155,24 @@ class HistoryHunter:
                         }
                         return document.body.innerText; // Fallback to full page text
                     }""")
-                    
-                    # 4. REGEX PARSING (The Magic Part)
-                    # Pattern: "lowest price is 50999" ... "average and highest price are 70760"
-                    
-                    lowest_match = re.search(r'lowest price is\s*₹?([\d,]+)', page_text)
-                    average_match = re.search(r'average.*?price.*?₹?([\d,]+)', page_text)
-                    
-                    lowest = 0
-                    average = 0
-                    
-                    if lowest_match:
-                        lowest = int(lowest_match.group(1).replace(",", ""))
-                    
-                    if average_match:
-                        average = int(average_match.group(1).replace(",", ""))
-                    
-                    await browser.close()
-                    
-                    if lowest > 0:
-                        print(f"✅ Corrected History Data: Low: {lowest} | Avg: {average}")
-                        return {"lowest": lowest, "average": average}
-                    else:
-                        print("❌ History: Could not parse numbers from text.")
-                        return None
-
-                except Exception as e:
-                    print(f"❌ History Text Not Found: {e}")
-                    await browser.close()
-                    return None
+                
+                # 4. REGEX PARSING (The Magic Part)
+                with span("parse"):
+                    history = parse_history_text(page_text)
+                if not history:
+                    print("❌ History: Could not parse numbers from text.")
+                return history
 
+            except SiteBlocked: raise
             except Exception as e:
-                print(f"❌ History Error: {e}")
-                await browser.close()
+                print(f"❌ History Text Not Found: {e}")
                 return None
 
+        except SiteBlocked: raise
+        except Exception as e:
+            print(f"❌ History Error: {e}")
+            return None
+
 # TEST BLOCK
 if __name__ == "__main__":
     hunter = HistoryHunter()
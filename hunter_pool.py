@@ -0,0 +1,215 @@
+import os
+import time
+import signal
+import asyncio
+import itertools
+import multiprocessing
+from retailers import ADAPTERS
+from site_guard import site_guard
+
+# --- HUNTER PROCESSES ---
+# ZIVA_HUNTER_PROCESSES=N: retailer and history hunts run in N child processes, each with its
+# own event loop, Playwright and Chromium, instead of all sharing the API process (and its one
+# core). The API sends ("run", id, kind, args) over a pipe to the least-busy child and awaits
+# the reply; a child that dies is replaced and whatever it was running fails fast.
+
+class HunterCrashed(Exception):
+    pass
+
+
+# --- CHILD SIDE ---
+def _child_main(conn):
+    # Ctrl+C reaches the whole process group: let the parent decide when we stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_serve(conn))
+
+async def _serve(conn):
+    # Imported here so the API process doesn't pay for them at import time
+    from browser_pool import BrowserPool
+    from price_hunter import PriceHunter
+    from history_hunter import HistoryHunter
+
+    pool = BrowserPool()
+    await pool.start()
+    loop = asyncio.get_running_loop()
+    inbox = asyncio.Queue()
+    running = {}
+
+    def receive():
+        try: inbox.put_nowait(conn.recv())
+        except (EOFError, OSError):
+            # Parent went away
+            loop.remove_reader(conn.fileno())
+            inbox.put_nowait(None)
+    loop.add_reader(conn.fileno(), receive)
+
+    async def run(job_id, kind, args):
+        try:
+            if kind == "market":
+                site = args[0]
+                value = await PriceHunter(pool=pool).hunt_site(*args)
+                # The parent keeps the health that decides benching; hand it our sample
+                reply = {"value": value, "health": ADAPTERS[site].health.last,
+                         "backoff": site_guard.backing_off(site)}
+            else:
+                reply = {"value": await HistoryHunter(pool=pool).get_history(*args),
+                         "backoff": site_guard.backing_off("pricehistory")}
+            conn.send((job_id, True, reply))
+        except asyncio.CancelledError:
+            pass  # The parent stopped waiting, nobody to answer
+        except Exception as e:
+            try: conn.send((job_id, False, f"{e.__class__.__name__}: {e}"))
+            except OSError: pass
+        finally:
+            running.pop(job_id, None)
+
+    while True:
+        message = await inbox.get()
+        if message is None: break
+        if message[0] == "cancel":
+            task = running.get(message[1])
+            if task: task.cancel()
+        else:
+            _, job_id, kind, args = message
+            running[job_id] = asyncio.create_task(run(job_id, kind, args))
+
+    for task in list(running.values()): task.cancel()
+    await asyncio.gather(*running.values(), return_exceptions=True)
+    await pool.stop()
+
+
+# --- PARENT SIDE ---
+class _Hunter:
+    def __init__(self, ctx, slot):
+        self.slot = slot
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_child_main, args=(child_conn,), name=f"ziva-hunter-{slot}", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.pending = {}  # job id -> future
+        self.served = 0
+        self.alive = True
+
+    @property
+    def load(self):
+        return len(self.pending)
+
+
+class HunterPool:
+    def __init__(self, size=None):
+        self.size = size if size is not None else int(os.getenv("ZIVA_HUNTER_PROCESSES", "0"))
+        # spawn, not fork: the parent already has an event loop and threads running
+        self._ctx = multiprocessing.get_context("spawn")
+        self._hunters = []
+        self._ids = itertools.count()
+        self._watcher = None
+        self.restarts = 0
+        self.crashed_jobs = 0
+
+    # --- LIFECYCLE ---
+    async def start(self):
+        if not self.size or self._hunters: return
+        self._hunters = [self._spawn(slot) for slot in range(self.size)]
+        self._watcher = asyncio.create_task(self._watch())
+        print(f"🧵 Hunter Pool: {self.size} processes online")
+
+    async def stop(self):
+        if self._watcher: self._watcher.cancel()
+        hunters, self._hunters = self._hunters, []
+        for hunter in hunters:
+            if hunter.alive:
+                try: hunter.conn.send(None)
+                except OSError: pass
+        deadline = time.time() + 10
+        for hunter in hunters:
+            await asyncio.to_thread(hunter.process.join, max(0.1, deadline - time.time()))
+            if hunter.process.is_alive(): hunter.process.terminate()
+            self._retire(hunter, "hunter pool stopped", crashed=False)
+
+    def _spawn(self, slot):
+        hunter = _Hunter(self._ctx, slot)
+        asyncio.get_running_loop().add_reader(hunter.conn.fileno(), self._on_reply, hunter)
+        return hunter
+
+    def _retire(self, hunter, why, crashed=True):
+        if not hunter.alive: return
+        hunter.alive = False
+        try: asyncio.get_running_loop().remove_reader(hunter.conn.fileno())
+        except (OSError, ValueError): pass
+        hunter.conn.close()
+        for future in hunter.pending.values():
+            if not future.done(): future.set_exception(HunterCrashed(why))
+        if crashed: self.crashed_jobs += len(hunter.pending)
+        hunter.pending.clear()
+
+    async def _watch(self):
+        # Replace dead children (at most once a second, so a crash loop can't spin)
+        while True:
+            await asyncio.sleep(1)
+            for i, hunter in enumerate(self._hunters):
+                if hunter.alive and hunter.process.is_alive(): continue
+                print(f"💥 Hunter {hunter.slot}: Died (exit {hunter.process.exitcode}), restarting")
+                self._retire(hunter, f"hunter process {hunter.slot} died")
+                self._hunters[i] = self._spawn(hunter.slot)
+                self.restarts += 1
+
+    def _on_reply(self, hunter):
+        try:
+            job_id, ok, payload = hunter.conn.recv()
+        except (EOFError, OSError):
+            self._retire(hunter, f"hunter process {hunter.slot} died")
+            return
+        future = hunter.pending.pop(job_id, None)
+        hunter.served += 1
+        if not future or future.done(): return
+        if ok: future.set_result(payload)
+        else: future.set_exception(RuntimeError(payload))
+
+    # --- DISPATCH ---
+    async def call(self, kind, *args):
+        alive = [hunter for hunter in self._hunters if hunter.alive]
+        if not alive: raise HunterCrashed("no hunter process available")
+        hunter = min(alive, key=lambda h: h.load)
+        job_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        hunter.pending[job_id] = future
+        hunter.conn.send(("run", job_id, kind, args))
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Deadline hit on our side: free the child's page too
+            hunter.pending.pop(job_id, None)
+            if hunter.alive:
+                try: hunter.conn.send(("cancel", job_id))
+                except OSError: pass
+            raise
+
+    async def hunt_site(self, site, query, match_title=None):
+        started = time.perf_counter()
+        try:
+            reply = await self.call("market", site, query, match_title)
+        except (HunterCrashed, RuntimeError):
+            # The child died or its hunt blew up (e.g. timed out) before it could send its sample:
+            # a failure for this site. Cancellation (the caller's budget) is not, and isn't caught here.
+            ADAPTERS[site].health.record(False, time.perf_counter() - started)
+            raise
+        # The child's own health sample for this hunt goes to the parent's adapter...
+        if reply.get("health"): ADAPTERS[site].health.record(*reply["health"])
+        # ...and its site backoff, so the API serves stored prices meanwhile
+        if reply.get("backoff"): site_guard.hold(site, reply["backoff"])
+        return reply["value"]
+
+    async def get_history(self, query, match_title=None):
+        reply = await self.call("history", query, match_title)
+        if reply.get("backoff"): site_guard.hold("pricehistory", reply["backoff"])
+        return reply["value"]
+
+    def stats(self):
+        return {
+            "processes": self.size,
+            "alive": sum(1 for hunter in self._hunters if hunter.alive),
+            "restarts": self.restarts,
+            "crashed_jobs": self.crashed_jobs,
+            "workers": [{"slot": h.slot, "pid": h.process.pid, "in_flight": h.load, "served": h.served}
+                        for h in self._hunters],
+        }
@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import asyncio
+import sqlite3
+import ipaddress
+import threading
+from urllib.parse import urlparse
+
+# --- SCAN JOB QUEUE ---
+# Job mode: the API only enqueues, separate worker processes (worker.py, each with its own
+# browser pool) claim jobs and write results back. SQLite is the local backend: every API
+# node and worker must see the same file. Claims are leases, so a job whose worker died is
+# picked up again once its lease runs out.
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# ZIVA_CALLBACK_HOSTS=a.example,b.example: only these callback hosts, trusted wherever they resolve
+CALLBACK_HOSTS = {host.strip().lower() for host in os.getenv("ZIVA_CALLBACK_HOSTS", "").split(",") if host.strip()}
+
+
+def check_callback(url):
+    # Callbacks are POSTed from inside our network: refuse hosts that resolve to private, loopback,
+    # link-local (cloud metadata) or other non-public addresses. Blocking DNS, call it off the loop.
+    parsed = urlparse(url or "")
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("Callback must be an http(s) URL")
+    host = parsed.hostname.lower()
+    if CALLBACK_HOSTS:
+        if host not in CALLBACK_HOSTS: raise ValueError(f"Callback host {host} is not allowed")
+        return url
+    try:
+        infos = socket.getaddrinfo(host, parsed.port or 443, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"Callback host {host} does not resolve")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if address.version == 6 and address.ipv4_mapped: address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"Callback host {host} resolves to a non-public address")
+    return url
+
+
+class JobQueue:
+    def __init__(self, db_path=None, max_attempts=None):
+        self.db_path = db_path or os.getenv("ZIVA_JOB_DB", "jobs.sqlite")
+        self.max_attempts = max_attempts or int(os.getenv("ZIVA_JOB_MAX_ATTEMPTS", "2"))
+        self._lock = threading.Lock()
+        # Autocommit; claims take the write lock explicitly with BEGIN IMMEDIATE
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                callback TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_until REAL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at)")
+
+    # --- API SIDE ---
+    def submit(self, kind, payload, callback=None):
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, payload, status, callback, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), QUEUED, callback, time.time()),
+            )
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row: return None
+        job = {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+        if row["status"] == QUEUED:
+            job["position"] = self.position(row["created_at"])
+        if row["result"]: job["result"] = json.loads(row["result"])
+        if row["error"]: job["error"] = row["error"]
+        return job
+
+    def position(self, created_at):
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?", (QUEUED, created_at)
+            ).fetchone()[0]
+
+    # --- WORKER SIDE ---
+    def claim(self, worker, lease=120):
+        # Oldest queued job (or one whose worker stopped renewing its lease) -> this worker
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT * FROM jobs WHERE status = ? OR (status = ? AND lease_until < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (QUEUED, RUNNING, now),
+                ).fetchone()
+                if row:
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, lease_until = ?, started_at = ?, attempts = attempts + 1 "
+                        "WHERE id = ?",
+                        (RUNNING, worker, now + lease, now, row["id"]),
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        if not row: return None
+        if row["attempts"] >= self.max_attempts:
+            # Its previous worker(s) died mid-job too many times: give up instead of crash-looping
+            self.finish(row["id"], worker, error=f"Gave up after {row['attempts']} attempts")
+            return None
+        return {"id": row["id"], "kind": row["kind"], "payload": json.loads(row["payload"]),
+                "callback": row["callback"], "attempt": row["attempts"] + 1}
+
+    def renew(self, job_id, worker, lease=120):
+        with self._lock:
+            self._db.execute("UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = ?",
+                             (time.time() + lease, job_id, worker, RUNNING))
+
+    def finish(self, job_id, worker, result=None, error=None):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL "
+                "WHERE id = ? AND worker = ?",
+                (FAILED if error else DONE, json.dumps(result) if result is not None else None, error,
+                 time.time(), job_id, worker),
+            )
+
+    def purge(self, older_than):
+        # Drop finished jobs older than `older_than` seconds
+        with self._lock:
+            self._db.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                             (DONE, FAILED, time.time() - older_than))
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)}
+
+
+class ScanWorker:
+    # Claims jobs and runs them with `run_job(job) -> result dict`, `concurrency` at a time.
+    # Used by worker.py (separate process) and, for single-node setups, inside the API process.
+    def __init__(self, queue, run_job, notify=None, concurrency=None, poll=None, lease=None):
+        self.queue = queue
+        self.run_job = run_job
+        self.notify = notify  # async (url, body) -> None, for job callbacks
+        self.concurrency = concurrency or int(os.getenv("ZIVA_WORKER_CONCURRENCY", "4"))
+        self.poll = poll or float(os.getenv("ZIVA_WORKER_POLL", "0.5"))
+        self.lease = lease or float(os.getenv("ZIVA_JOB_LEASE", "120"))
+        self.name = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._tasks = []
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        print(f"🛠️ Worker {self.name}: Taking scan jobs ({self.concurrency} at a time)")
+        self._tasks = [asyncio.create_task(self._loop()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._tasks: task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _loop(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.queue.claim, self.name, self.lease)
+            except Exception as e:
+                print(f"❌ Worker: Could not claim a job: {e}")
+                job = None
+            if not job:
+                await asyncio.sleep(self.poll * random.uniform(0.8, 1.2))
+                continue
+            await self.process(job)
+
+    async def _heartbeat(self, job_id):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            await asyncio.to_thread(self.queue.renew, job_id, self.name, self.lease)
+
+    async def process(self, job):
+        print(f"🛠️ Worker: Job {job['id']} ({job['kind']}, attempt {job['attempt']})")
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"]))
+        result, error = None, None
+        try:
+            result = await self.run_job(job)
+            self.completed += 1
+        except Exception as e:
+            print(f"❌ Worker: Job {job['id']} failed: {e}")
+            error = str(e) or e.__class__.__name__
+            self.failed += 1
+        finally:
+            heartbeat.cancel()
+        await asyncio.to_thread(self.queue.finish, job["id"], self.name, result=result, error=error)
+
+        if job["callback"] and self.notify:
+            body = {"job_id": job["id"], "status": FAILED if error else DONE, "result": result, "error": error}
+            try:
+                # Again at send time: the host may resolve somewhere else by now
+                await asyncio.to_thread(check_callback, job["callback"])
+                await self.notify(job["callback"], body)
+            except Exception as e: print(f"⚠️ Worker: Callback for {job['id']} failed: {e}")
+
+    def stats(self):
+        return {"name": self.name, "concurrency": self.concurrency,
+                "completed": self.completed, "failed": self.failed}
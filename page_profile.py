@@ -0,0 +1,117 @@
+import asyncio
+from urllib.parse import urlparse
+from fast_fetch import SITE_ROOT
+from telemetry import metrics
+
+# --- LEAN PAGE PROFILES ---
+# What a hunter's page is allowed to download. We only ever read text out of these pages,
+# so images, fonts, media, ads and analytics are aborted before they hit the network.
+# Each profile also says how long goto() should wait (commit / domcontentloaded, never "load").
+
+PAGE_BYTES = metrics.counter("ziva_page_bytes_total", "Bytes downloaded by browser pages, per profile.")
+PAGE_REQUESTS = metrics.counter("ziva_page_requests_total", "Browser sub-requests per profile, allowed or blocked.")
+
+# Resource types nobody needs to read a title and a price
+HEAVY_TYPES = {"image", "media", "font", "stylesheet"}
+# Noise that never affects the DOM we read
+NOISE_TYPES = {"beacon", "ping", "csp_report", "manifest", "texttrack", "eventsource", "websocket"}
+
+# Ads, analytics, tag managers, session recorders, push/engagement SDKs
+TRACKER_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com", "doubleclick.net",
+    "googlesyndication.com", "googleadservices.com", "adservice.google.com", "analytics.google.com",
+    "facebook.net", "facebook.com", "connect.facebook.net", "hotjar.com", "clarity.ms", "bing.com",
+    "criteo.com", "criteo.net", "taboola.com", "outbrain.com", "amazon-adsystem.com",
+    "scorecardresearch.com", "branch.io", "moengage.com", "webengage.com", "clevertap-prod.com",
+    "wzrkt.com", "nr-data.net", "newrelic.com", "sentry.io", "segment.io", "mixpanel.com",
+    "appsflyer.com", "onesignal.com", "tiktok.com", "snapchat.com", "quantserve.com", "adnxs.com",
+)
+
+
+def host_matches(host, domains):
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class PageProfile:
+    def __init__(self, name, first_party=(), block_types=HEAVY_TYPES | NOISE_TYPES,
+                 block_third_party=True, wait_until="domcontentloaded"):
+        self.name = name
+        # Stand-in host (benchmarks) always counts as first party
+        stand_in = (urlparse(SITE_ROOT).hostname,) if SITE_ROOT else ()
+        self.first_party = tuple(first_party) + stand_in
+        self.block_types = frozenset(block_types)
+        # True: only first-party hosts load. False: everything except known trackers.
+        self.block_third_party = block_third_party
+        self.wait_until = wait_until
+
+    def blocks(self, resource_type, url):
+        if resource_type in self.block_types: return True
+        host = (urlparse(url).hostname or "").lower()
+        if not host: return False
+        if host_matches(host, TRACKER_DOMAINS): return True
+        return self.block_third_party and bool(self.first_party) and not host_matches(host, self.first_party)
+
+    async def apply(self, page):
+        # Installs the filter + byte counter on a fresh page; returns the traffic tally
+        traffic = PageTraffic(self.name)
+
+        async def route(route):
+            request = route.request
+            if self.blocks(request.resource_type, request.url):
+                traffic.blocked += 1
+                await route.abort()
+            else:
+                traffic.allowed += 1
+                await route.continue_()
+
+        await page.route("**/*", route)
+        page.on("requestfinished", traffic.measure)
+        return traffic
+
+
+class PageTraffic:
+    def __init__(self, profile):
+        self.profile = profile
+        self.allowed = 0
+        self.blocked = 0
+        self.bytes = 0
+        self._pending = set()
+
+    def measure(self, request):
+        # sizes() is only available async, so tally in the background and settle on close
+        task = asyncio.ensure_future(self._add_sizes(request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _add_sizes(self, request):
+        try:
+            sizes = await request.sizes()
+            self.bytes += sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+        except Exception:
+            pass
+
+    async def settle(self):
+        if self._pending:
+            await asyncio.wait(list(self._pending), timeout=1)
+        PAGE_BYTES.inc(self.bytes, profile=self.profile)
+        PAGE_REQUESTS.inc(self.allowed, profile=self.profile, outcome="allowed")
+        PAGE_REQUESTS.inc(self.blocked, profile=self.profile, outcome="blocked")
+        print(f"📦 {self.profile}: {self.bytes / 1024:.0f} KB over {self.allowed} requests ({self.blocked} blocked)")
+
+
+# Server-rendered result pages: first-party HTML/JS only
+PROFILES = {profile.name: profile for profile in [
+    PageProfile("default", block_third_party=False),
+    PageProfile("flipkart", first_party=("flipkart.com", "flixcart.com", "flipkart.net")),
+    PageProfile("amazon", first_party=("amazon.in", "amazon.com", "media-amazon.com", "ssl-images-amazon.com")),
+    PageProfile("reliance", first_party=("reliancedigital.in", "jio.com")),
+    PageProfile("vijaysales", first_party=("vijaysales.com",)),
+    # Client-rendered and click-driven: keep its CSS (visibility checks) and any non-tracker host
+    PageProfile("croma", block_types=(HEAVY_TYPES - {"stylesheet"}) | NOISE_TYPES, block_third_party=False),
+    PageProfile("history", first_party=("pricehistoryapp.com",)),
+    # Arbitrary product URL from /scan: we don't know its first party, so denylist only
+    PageProfile("page", block_third_party=False, wait_until="commit"),
+]}
+
+def profile_for(name):
+    return PROFILES.get(name, PROFILES["default"])
@@ -0,0 +1,133 @@
+import os
+import math
+import time
+import random
+import asyncio
+
+# --- BACKGROUND PRE-WARMING ---
+# Remembers which products people keep asking about and re-scrapes the hottest ones
+# shortly before their cached market/history data expires, so nobody pays a cold scan.
+
+
+class PopularityTracker:
+    # Exponentially decayed hit counts: a product asked 50 times last week
+    # ranks below one asked 10 times in the last hour.
+    def __init__(self, half_life=None, max_keys=5000):
+        self.half_life = half_life or float(os.getenv("ZIVA_PREWARM_HALF_LIFE", "3600"))
+        self.max_keys = max_keys
+        self._scores = {}  # key -> [score, last_seen, title]
+
+    def _decayed(self, score, last_seen, now):
+        return score * math.exp(-(now - last_seen) * math.log(2) / self.half_life)
+
+    def note(self, key, title):
+        if not key: return
+        now = time.time()
+        entry = self._scores.get(key)
+        score = self._decayed(entry[0], entry[1], now) if entry else 0.0
+        self._scores[key] = [score + 1.0, now, title]
+        if len(self._scores) > self.max_keys:
+            self._prune(now)
+
+    def _prune(self, now):
+        ranked = sorted(self._scores.items(), key=lambda kv: self._decayed(kv[1][0], kv[1][1], now), reverse=True)
+        self._scores = dict(ranked[:self.max_keys // 2])
+
+    def top(self, k):
+        now = time.time()
+        ranked = sorted(self._scores.items(), key=lambda kv: self._decayed(kv[1][0], kv[1][1], now), reverse=True)
+        return [(key, entry[2]) for key, entry in ranked[:k]]
+
+
+class RateGate:
+    # At most `per_minute` refreshes per retailer; callers wait their turn
+    def __init__(self, per_minute):
+        self.interval = 60.0 / max(per_minute, 0.01)
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, name):
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(name, now))
+            self._next_slot[name] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class PrewarmScheduler:
+    # plan(key, title) -> [{"label", "source", "cache_key", "refresh"}] describes what to keep warm
+    def __init__(self, cache, plan, tracker=None):
+        self.cache = cache
+        self.plan = plan
+        self.tracker = tracker or PopularityTracker()
+        self.enabled = os.getenv("ZIVA_PREWARM", "0") == "1"
+        self.top_k = int(os.getenv("ZIVA_PREWARM_TOP_K", "20"))
+        self.interval = float(os.getenv("ZIVA_PREWARM_INTERVAL", "60"))
+        # Refresh anything that would go stale within this many seconds
+        self.lead = float(os.getenv("ZIVA_PREWARM_LEAD", "180"))
+        self.max_jitter = float(os.getenv("ZIVA_PREWARM_JITTER", "5"))
+        self.gate = RateGate(float(os.getenv("ZIVA_PREWARM_PER_SITE_PER_MIN", "6")))
+        self._concurrency = asyncio.Semaphore(int(os.getenv("ZIVA_PREWARM_CONCURRENCY", "2")))
+        self._task = None
+        self.refreshed = 0
+        self.failed = 0
+
+    def note(self, key, title):
+        self.tracker.note(key, title)
+
+    # --- LIFECYCLE ---
+    def start(self):
+        if not self.enabled or self._task: return
+        print(f"🔥 Prewarm: Keeping the top {self.top_k} products warm (every ~{self.interval:.0f}s)")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self._task: return
+        self._task.cancel()
+        try: await self._task
+        except asyncio.CancelledError: pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval * random.uniform(0.8, 1.2))
+            try: await self.tick()
+            except Exception as e: print(f"❌ Prewarm Error: {e}")
+
+    # --- WORK ---
+    def due(self):
+        # Every job for a hot product whose cache entry is missing or about to expire
+        jobs = []
+        for key, title in self.tracker.top(self.top_k):
+            for job in self.plan(key, title):
+                remaining = self.cache.expires_in(job["source"], job["cache_key"])
+                if remaining is None or remaining < self.lead:
+                    jobs.append(job)
+        return jobs
+
+    async def tick(self):
+        jobs = self.due()
+        if jobs: print(f"🔥 Prewarm: Refreshing {len(jobs)} stale entries")
+        await asyncio.gather(*[self._refresh(job) for job in jobs])
+
+    async def _refresh(self, job):
+        async with self._concurrency:
+            await self.gate.wait(job["label"])
+            # Jitter so hot products don't all hit a retailer on the same second
+            await asyncio.sleep(random.uniform(0, self.max_jitter))
+            try:
+                await job["refresh"]()
+                self.refreshed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ Prewarm {job['label']}: {e}")
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "tracked": len(self.tracker._scores),
+            "hot": [title for _, title in self.tracker.top(5)],
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+        }
@@ -1,140 +1,125 @@
+import os
+import time
 import asyncio
-from playwright.async_api import async_playwright
-from thefuzz import fuzz
+from browser_pool import borrow_pool
+from retailers import ADAPTERS, enabled_adapters
+from telemetry import span, SCRAPES
+from site_guard import site_guard, SiteBlocked
+
+
+class CostLimiter:
+    # Weighted semaphore: each scrape holds `cost` units of the browser's capacity,
+    # so one heavy Croma flow counts for more than a quick search-URL fetch.
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.in_use = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, cost):
+        cost = min(cost, self.capacity)
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_use + cost <= self.capacity)
+            self.in_use += cost
+        return cost
+
+    async def release(self, cost):
+        async with self._cond:
+            self.in_use -= cost
+            self._cond.notify_all()
+
+
+# Shared by every hunt in this process (there is one browser per process)
+retail_capacity = CostLimiter(int(os.getenv("ZIVA_RETAIL_CAPACITY", "8")))
+
 
 class PriceHunter:
-    # --- AGENT 1: FLIPKART ---
-    async def search_flipkart(self, page, query):
-        try:
-            print(f"🕵️‍♂️ Scanning Flipkart for '{query}'...")
-            await page.goto(f"https://www.flipkart.com/search?q={query}", timeout=15000)
-            
-            try:
-                await page.wait_for_selector('div.RG5Slk, div.KzDlHZ, div._4rR01T, a.s1Q9rs', timeout=5000)
-            except: pass
-
-            products = await page.eval_on_selector_all('div[data-id], div._1AtVbE', """
-                elements => elements.map(el => {
-                    const titleEl = el.querySelector('div.RG5Slk, div.KzDlHZ, div._4rR01T, a.s1Q9rs');
-                    const priceEl = el.querySelector('div.hZ3P6w, div.DeU9vF, div.Nx9bqj, div._30jeq3');
-                    const linkEl = el.querySelector('a');
-                    if (titleEl && priceEl) {
-                        return { title: titleEl.innerText, price: priceEl.innerText, link: linkEl ? linkEl.getAttribute('href') : null };
-                    }
-                    return null;
-                }).filter(item => item !== null)
-            """)
-
-            for item in products:
-                try:
-                    price_clean = int(item['price'].replace("₹", "").replace(",", "").split(" ")[0].strip())
-                    if fuzz.partial_ratio(query.lower(), item['title'].lower()) > 60:
-                        full_link = "https://www.flipkart.com" + item['link'] if item['link'] and not item['link'].startswith("http") else item['link']
-                        return {"site": "Flipkart", "title": item['title'], "price": price_clean, "link": full_link}
-                except: continue 
+    def __init__(self, pool=None):
+        # Shared BrowserPool from the API lifespan; None = launch our own (CLI/testing)
+        self.pool = pool
+
+    @staticmethod
+    def active_sites():
+        return [adapter.name for adapter in enabled_adapters()]
+
+    # --- ONE RETAILER ---
+    async def hunt_site(self, site, original_title, match_title=None):
+        # Fast path first (plain HTTP, no browser); Chromium only when that comes back empty.
+        # We search with the cleaned query but match cards against the full title (variant info).
+        adapter = ADAPTERS[site]
+        clean_query = original_title.split("(")[0].split("|")[0].strip()
+        match_title = match_title or original_title
+
+        remaining = site_guard.backing_off(site)
+        if remaining:
+            # It was serving captchas a moment ago: don't queue up behind it, let callers use what we know
+            print(f"🧱 {adapter.label}: Backing off for {remaining:.0f}s more, skipped")
+            SCRAPES.inc(retailer=site, path="none", outcome="blocked")
             return None
-        except: return None
 
-    # --- AGENT 2: CROMA (Popup Killer Edition) ---
-    async def search_croma(self, page, query):
+        started = time.perf_counter()
+        ok = False
+        blocked = False
+        cancelled = False
+        path = "http"
         try:
-            print(f"🕵️‍♂️ Scanning Croma for '{query}'...")
-            await page.goto("https://www.croma.com/", timeout=20000)
-            
-            # 1. POPUP KILLER & WAITER
             try:
-                # Wait for page to settle
-                await page.wait_for_load_state('domcontentloaded')
-                # Press ESCAPE to close "Select Pincode" or "Login" popups
-                await page.keyboard.press("Escape")
-                await asyncio.sleep(1) 
-            except: pass
-
-            # 2. FIND SEARCH BAR (The "Dumb" Strategy)
-            # We look for ANY visible text input. The search bar is usually the first one in the header.
-            try:
-                # Selector: Find any input that is text or search type
-                search_input = await page.wait_for_selector('input[type="text"], input[type="search"]', state="visible", timeout=15000)
-                
-                if search_input:
-                    await search_input.click()
-                    await search_input.fill(query)
-                    await search_input.press("Enter")
-                    print("✅ Croma: Search query submitted.")
-                else:
-                    print("❌ Croma: No search bar found.")
-                    return None
-
-                # 3. WAIT FOR RESULTS
-                # Increased timeout to 15s because Croma is slow
-                await page.wait_for_selector('li.product-item, div.product-item, div.cp-product-box', timeout=15000)
-                
+                candidates = await adapter.fast_search(clean_query)
+            except SiteBlocked: raise
             except Exception as e:
-                print(f"❌ Croma Navigation Failed: {e}")
-                return None
-
-            # 4. SCRAPE DATA
-            data = await page.evaluate("""() => {
-                const card = document.querySelector('li.product-item, div.product-item, div.cp-product-box');
-                if (!card) return null;
-                
-                let title = card.querySelector('h3.product-title, h3 a, .product-title a');
-                
-                let price = card.querySelector('.amount');
-                if (!price) price = card.querySelector('.new-price');
-                if (!price) price = card.querySelector('.cp-price');
-
-                let link = card.querySelector('a');
-                if (title && title.tagName === 'A') link = title;
-
-                return { 
-                    title: title ? title.innerText : null, 
-                    price: price ? price.innerText : null, 
-                    link: link ? link.getAttribute('href') : null 
-                };
-            }""")
-
-            if data and data['title'] and data['price']:
-                raw_price = data['price'].replace("₹", "").replace(",", "").strip()
-                price_clean = int(float(raw_price))
-                full_link = "https://www.croma.com" + data['link'] if not data['link'].startswith("http") else data['link']
-                
-                print(f"✅ Found on Croma: {data['title']} @ ₹{price_clean}")
-                return {"site": "Croma", "title": data['title'], "price": price_clean, "link": full_link}
-            
-            print("❌ Croma: Results loaded but scraper couldn't read data.")
+                print(f"⚡ {adapter.label} fast path error: {e}")
+                candidates = []
+            with span("match"):
+                match = adapter.pick(match_title, candidates)
+            if match:
+                ok = True
+                print(f"⚡ {adapter.label}: Served without a browser")
+                return match
+
+            path = "browser"
+            candidates = await self._browser_search(adapter, clean_query)
+            ok = bool(candidates)
+            with span("match"):
+                return adapter.pick(match_title, candidates)
+        except SiteBlocked as e:
+            blocked = True
+            print(f"🧱 {adapter.label}: {e}")
             return None
+        except asyncio.CancelledError:
+            # The caller's request budget ran out, not the adapter's own timeouts: says nothing
+            # about the retailer (and a tiny client budget must not be able to bench it)
+            cancelled = True
+            raise
         except Exception as e:
-            print(f"❌ Croma Error: {e}")
+            print(f"❌ {adapter.label} Error: {e}")
             return None
+        finally:
+            if not cancelled: adapter.health.record(ok, time.perf_counter() - started)
+            if ok: site_guard.report_ok(site)
+            outcome = "cancelled" if cancelled else "blocked" if blocked else "success" if ok else "failure"
+            SCRAPES.inc(retailer=site, path=path, outcome=outcome)
+
+    async def _browser_search(self, adapter, clean_query):
+        # One adapter on its own isolated context + page, holding `cost` units of browser capacity
+        held = await retail_capacity.acquire(adapter.cost)
+        try:
+            async with borrow_pool(self.pool, max_pages=1) as pool:
+                async with pool.page(profile=adapter.profile) as page:
+                    return await adapter.search(page, clean_query)
+        finally:
+            await retail_capacity.release(held)
 
     # --- THE MANAGER ---
     async def hunt(self, original_title):
-        clean_query = original_title.split("(")[0].split("|")[0].strip()
         results = []
-        
-        async with async_playwright() as p:
-            # STEALTH MODE
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                # Real User Agent is critical for Croma
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            )
-            
-            page1 = await context.new_page()
-            page2 = await context.new_page()
-            
-            task1 = self.search_flipkart(page1, clean_query)
-            task2 = self.search_croma(page2, clean_query)
-            
-            res1, res2 = await asyncio.gather(task1, task2)
-            await browser.close()
-            
-            if res1: results.append(res1)
-            if res2: results.append(res2)
-            
+        sites = self.active_sites()
+        async with borrow_pool(self.pool, max_pages=len(sites) or 1) as pool:
+            hunter = PriceHunter(pool=pool)
+            found = await asyncio.gather(*[hunter.hunt_site(site, original_title) for site in sites])
+            for res in found:
+                if res: results.append(res)
+
         return results
 
 if __name__ == "__main__":
     hunter = PriceHunter()
-    print(asyncio.run(hunter.hunt("OnePlus 13R")))
\ No newline at end of file
+    print(asyncio.run(hunter.hunt("OnePlus 13R")))
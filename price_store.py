@@ -0,0 +1,111 @@
+import os
+import time
+import sqlite3
+import threading
+
+# --- OUR OWN PRICE HISTORY ---
+# Every price the hunters see is appended here, so lowest/average/percentiles can be
+# answered from our own series instead of scraping pricehistoryapp.com each time.
+
+DAY = 24 * 60 * 60
+
+
+def percentile(ordered, pct):
+    # Nearest-rank percentile over an already sorted list
+    if not ordered: return None
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[rank]
+
+
+class PriceStore:
+    def __init__(self, db_path=None, min_observations=None, min_days=None):
+        self.db_path = db_path or os.getenv("ZIVA_PRICE_DB", "price_history.sqlite")
+        # What counts as "we have coverage" for a product
+        self.min_observations = min_observations or int(os.getenv("ZIVA_HISTORY_MIN_OBSERVATIONS", "5"))
+        self.min_days = min_days if min_days is not None else float(os.getenv("ZIVA_HISTORY_MIN_DAYS", "7"))
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS observations (
+                site TEXT NOT NULL,
+                product_key TEXT NOT NULL,
+                price INTEGER NOT NULL,
+                observed_at REAL NOT NULL,
+                title TEXT,
+                link TEXT
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_obs_product_time ON observations (product_key, observed_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_obs_time ON observations (observed_at)")
+        self._db.commit()
+        print(f"📒 Price Store: {self.db_path}")
+
+    # --- WRITE ---
+    def record(self, site, product_key, price, title=None, link=None, observed_at=None):
+        if not product_key or not price or price <= 0: return
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO observations (site, product_key, price, observed_at, title, link) VALUES (?, ?, ?, ?, ?, ?)",
+                (site, product_key, int(price), observed_at or time.time(), title, link),
+            )
+            self._db.commit()
+
+    # --- READ ---
+    def series(self, product_key, days=90):
+        since = time.time() - days * DAY
+        with self._lock:
+            return self._db.execute(
+                "SELECT site, price, observed_at FROM observations "
+                "WHERE product_key = ? AND observed_at >= ? ORDER BY observed_at",
+                (product_key, since),
+            ).fetchall()
+
+    def latest(self, site, product_key, days=7):
+        # Most recent observation of a product at one site (what we serve while it blocks us)
+        since = time.time() - days * DAY
+        with self._lock:
+            row = self._db.execute(
+                "SELECT price, title, link, observed_at FROM observations "
+                "WHERE product_key = ? AND site = ? AND observed_at >= ? ORDER BY observed_at DESC LIMIT 1",
+                (product_key, site, since),
+            ).fetchone()
+        if not row: return None
+        return {"price": row[0], "title": row[1], "link": row[2], "observed_at": row[3]}
+
+    def covers(self, rows):
+        if len(rows) < self.min_observations: return False
+        return (rows[-1][2] - rows[0][2]) >= self.min_days * DAY
+
+    def summary(self, product_key, days=90, require_coverage=True):
+        # Same lowest/average keys HistoryHunter returns, plus percentiles and a daily sparkline
+        rows = self.series(product_key, days)
+        if not rows or (require_coverage and not self.covers(rows)): return None
+
+        prices = sorted(row[1] for row in rows)
+        daily = {}
+        for _, price, observed_at in rows:
+            day = time.strftime("%Y-%m-%d", time.gmtime(observed_at))
+            daily[day] = min(price, daily.get(day, price))
+
+        return {
+            "lowest": prices[0],
+            "average": int(sum(prices) / len(prices)),
+            "highest": prices[-1],
+            "p10": percentile(prices, 10),
+            "p50": percentile(prices, 50),
+            "p90": percentile(prices, 90),
+            "observations": len(rows),
+            "sites": sorted({row[0] for row in rows}),
+            "since": time.strftime("%Y-%m-%d", time.gmtime(rows[0][2])),
+            "sparkline": [{"date": day, "price": price} for day, price in sorted(daily.items())],
+            "source": "ziva",
+        }
+
+    def stats(self):
+        with self._lock:
+            count, products = self._db.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT product_key) FROM observations"
+            ).fetchone()
+        return {"observations": count, "products": products}
@@ -0,0 +1,154 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from urllib.parse import urlparse, parse_qs
+
+from product_match import normalize, attributes, COLORS, STOPWORDS
+
+# --- CANONICAL PRODUCT IDS ---
+# "OnePlus 13R", "OnePlus 13R 5G (Nebula Noir, 256GB)", an Amazon /dp/ link and a Flipkart
+# ?pid= link should all land on the same cache entries. Every phrasing, ASIN and PID we see
+# is stored as an alias of a canonical ID, so later lookups reuse whichever came first.
+
+# Spec tokens that only describe the listing ("6.7inch", "50mp", "120hz"). Capacity and RAM are
+# not in here: "iPhone 15 128GB" and "iPhone 15 256GB" are different products with different prices.
+NOISE_TOKEN = re.compile(r'^\d+(\.\d+)?(inch|mp|hz)$')
+CAPACITY_TOKEN = re.compile(r'^\d+(\.\d+)?(gb|tb)$')
+ASIN_PATTERN = re.compile(r'/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})(?:[/?]|$)')
+FLIPKART_ITEM_PATTERN = re.compile(r'/p/(itm[a-z0-9]+)')
+
+
+def url_identifiers(url):
+    # Retailer IDs we trust more than any title: ["asin:B0CHX1W1XY", "fkpid:MOBGTAGPTB3VS24W"]
+    if not url or "://" not in url: return []
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    ids = []
+    if "amazon." in host:
+        asin = ASIN_PATTERN.search(parsed.path + "/")
+        if asin: ids.append(f"asin:{asin.group(1)}")
+    elif "flipkart." in host:
+        pid = parse_qs(parsed.query).get("pid")
+        if pid: ids.append(f"fkpid:{pid[0].upper()}")
+        item = FLIPKART_ITEM_PATTERN.search(parsed.path)
+        if item: ids.append(f"fkitm:{item.group(1)}")
+    return ids
+
+def variant_tokens(title):
+    # Canonical RAM / storage tokens from anywhere in the title: "(8 GB RAM, 1 TB)" -> ["8gb ram", "1024gb"]
+    attrs = attributes(title)
+    tokens = []
+    if "ram" in attrs: tokens.append(f"{attrs['ram']}gb ram")
+    if "storage" in attrs: tokens.append(f"{attrs['storage']}gb")
+    return tokens
+
+def signature(clean_title, title=None):
+    # Product fingerprint: brand + model words and the RAM/storage variant, no colours or marketing
+    # words. `title` is the full title when `clean_title` has had its "(..., 256GB)" cut off.
+    seen = []
+    for token in normalize(clean_title).split():
+        if token in STOPWORDS or token in COLORS or NOISE_TOKEN.match(token) or CAPACITY_TOKEN.match(token): continue
+        if token in ("gb", "ram"): continue
+        if token not in seen: seen.append(token)
+    return " ".join(seen + variant_tokens(title or clean_title))
+
+
+class ProductResolver:
+    # clean(title) -> the short search form (app's clean_title_for_search)
+    def __init__(self, clean, db_path=None):
+        self.clean = clean
+        self.db_path = db_path or os.getenv("ZIVA_IDENTITY_DB", "product_ids.sqlite")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS products (
+                product_id TEXT PRIMARY KEY,
+                title TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS aliases (
+                alias TEXT PRIMARY KEY,
+                product_id TEXT NOT NULL,
+                learned_from TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+        # Lookups happen several times per request, so the whole alias table lives in memory
+        self._aliases = dict(self._db.execute("SELECT alias, product_id FROM aliases").fetchall())
+        self._titles = dict(self._db.execute("SELECT product_id, title FROM products").fetchall())
+        self.resolved = 0
+        self.created = 0
+        print(f"🪪 Product IDs: {self.db_path} ({len(self._aliases)} aliases)")
+
+    def _title_aliases(self, title):
+        clean = self.clean(title)
+        aliases = [f"title:{normalize(title)}"] if title else []
+        sig = signature(clean, title)
+        if len(sig.split()) >= 2: aliases.append(f"sig:{sig}")  # a bare brand is not a product
+        return aliases, clean
+
+    def _lookup(self, aliases):
+        for alias in aliases:
+            product_id = self._aliases.get(alias)
+            if product_id: return product_id
+        return None
+
+    def _remember(self, product_id, aliases, learned_from):
+        now = time.time()
+        with self._lock:
+            for alias in aliases:
+                if alias in self._aliases: continue  # first phrasing wins
+                self._aliases[alias] = product_id
+                self._db.execute(
+                    "INSERT OR IGNORE INTO aliases (alias, product_id, learned_from, created_at) VALUES (?, ?, ?, ?)",
+                    (alias, product_id, learned_from, now),
+                )
+            self._db.commit()
+
+    # --- PUBLIC ---
+    def resolve(self, title, url=None):
+        # Canonical ID for a title and/or product URL, creating one on first sight
+        ids = url_identifiers(url)
+        title_aliases, clean = self._title_aliases(title)
+        aliases = ids + title_aliases
+        if not aliases: return clean.lower()
+
+        product_id = self._lookup(aliases)
+        if product_id:
+            self.resolved += 1
+        else:
+            # New product: the first phrasing's search key becomes its ID (same shape as the old cache keys),
+            # plus any RAM/storage the search key cut off so 128GB and 256GB don't share one
+            product_id = clean.lower() or ids[0]
+            stated = variant_tokens(product_id)
+            missing = [token for token in variant_tokens(title) if token not in stated]
+            if clean and missing: product_id = " ".join([product_id] + missing)
+            self.created += 1
+            with self._lock:
+                if product_id not in self._titles:
+                    self._titles[product_id] = title
+                    self._db.execute("INSERT OR IGNORE INTO products (product_id, title, created_at) VALUES (?, ?, ?)",
+                                     (product_id, title, time.time()))
+        self._remember(product_id, aliases, "request")
+        return product_id
+
+    def learn(self, product_id, title=None, url=None):
+        # A retailer card we matched confidently is another name for the same product
+        aliases = url_identifiers(url) + (self._title_aliases(title)[0] if title else [])
+        if product_id and aliases: self._remember(product_id, aliases, "match")
+
+    def known(self, url):
+        # (product_id, title) for a URL whose retailer ID we've seen before, else (None, None)
+        product_id = self._lookup(url_identifiers(url))
+        if not product_id: return None, None
+        return product_id, self._titles.get(product_id)
+
+    def stats(self):
+        return {"products": len(self._titles), "aliases": len(self._aliases),
+                "resolved": self.resolved, "created": self.created}
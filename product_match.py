@@ -0,0 +1,99 @@
+import re
+from rapidfuzz import fuzz, process
+
+# --- PRODUCT MATCHING ---
+# Scores every candidate card against the query in one pass, then corrects the raw text
+# similarity with the attributes that actually distinguish variants (storage, RAM, model, colour).
+
+COLORS = {
+    "black", "white", "blue", "green", "red", "silver", "gold", "grey", "gray", "purple", "pink",
+    "yellow", "orange", "bronze", "graphite", "midnight", "starlight", "titanium", "noir", "cream",
+}
+STOPWORDS = {"with", "and", "for", "the", "new", "latest", "edition", "5g", "4g", "smartphone", "mobile", "phone"}
+
+# Penalties (points out of 100) when both sides state an attribute and it differs
+PENALTIES = {"brand": 40, "model": 25, "storage": 30, "ram": 15, "color": 5}
+
+
+def normalize(title):
+    # "OnePlus 13R 5G (Nebula Noir, 256 GB)" -> "oneplus 13r 5g nebula noir 256gb"
+    text = (title or "").lower()
+    text = re.sub(r'(\d+)\s+(gb|tb|mah|inch)\b', r'\1\2', text)
+    text = re.sub(r'[^a-z0-9.]+', ' ', text)
+    return " ".join(text.split())
+
+def attributes(title):
+    text = normalize(title)
+    tokens = text.split()
+    attrs = {}
+    if tokens: attrs["brand"] = tokens[0]
+
+    ram = re.search(r'(\d+)gb ram', text)
+    if ram: attrs["ram"] = int(ram.group(1))
+    storage = [int(n) * (1024 if unit == "tb" else 1)
+               for n, unit in re.findall(r'(\d+)(gb|tb)\b(?! ram)', text)]
+    if storage: attrs["storage"] = max(storage)
+
+    # Model tokens: short alphanumerics with a digit ("13r", "s24", "a55", "15"), not specs
+    model = {t for t in tokens[1:6] if re.search(r'\d', t) and not re.search(r'(gb|tb|mah|inch|5g|4g)$', t) and len(t) <= 6}
+    if model: attrs["model"] = model
+
+    color = [t for t in tokens if t in COLORS]
+    if color: attrs["color"] = color[0]
+    return attrs
+
+
+class ProductMatcher:
+    def __init__(self, query, min_score=60):
+        self.query = normalize(" ".join(w for w in query.split() if w.lower() not in STOPWORDS))
+        self.attrs = attributes(query)
+        self.min_score = min_score
+
+    def _raw_scores(self, names):
+        # token_set forgives word order/extra words; token_sort breaks ties toward the
+        # candidate with fewer extras ("iPhone 15" over "iPhone 15 Plus").
+        set_scores = self._batch(names, fuzz.token_set_ratio)
+        sort_scores = self._batch(names, fuzz.token_sort_ratio)
+        return [0.75 * a + 0.25 * b for a, b in zip(set_scores, sort_scores)]
+
+    def _batch(self, names, scorer):
+        # rapidfuzz scores the whole list in C in one call
+        scores = [0.0] * len(names)
+        for _, score, index in process.extract(self.query, names, scorer=scorer, limit=None):
+            scores[index] = score
+        return scores
+
+    def _penalty(self, candidate_attrs):
+        penalty = 0
+        for field, points in PENALTIES.items():
+            mine, theirs = self.attrs.get(field), candidate_attrs.get(field)
+            if mine is None or theirs is None: continue
+            if field == "model":
+                if not mine & theirs: penalty += points
+            elif mine != theirs:
+                penalty += points
+        return penalty
+
+    def score_all(self, titles):
+        names = [normalize(t) for t in titles]
+        if not names: return []
+        return [max(0.0, float(raw) - self._penalty(attributes(title)))
+                for raw, title in zip(self._raw_scores(names), titles)]
+
+    def best(self, candidates, title_of=lambda c: c["title"]):
+        # (best candidate, confidence 0-1) or (None, 0.0) when nothing clears min_score
+        candidates = [c for c in candidates if title_of(c)]
+        scores = self.score_all([title_of(c) for c in candidates])
+        if not scores: return None, 0.0
+
+        # Ties go to the earlier card (retailers list their best match first)
+        ranked = sorted(range(len(candidates)), key=lambda i: (-scores[i], i))
+        top_index = ranked[0]
+        top_score = scores[top_index]
+        if top_score < self.min_score: return None, 0.0
+
+        # A clear winner is worth more than a photo finish between two variants
+        runner_up = scores[ranked[1]] if len(ranked) > 1 else 0.0
+        margin = min(1.0, (top_score - runner_up) / 20)
+        confidence = round((top_score / 100) * (0.8 + 0.2 * margin), 2)
+        return candidates[top_index], confidence
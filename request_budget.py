@@ -0,0 +1,70 @@
+import os
+import math
+import time
+import asyncio
+from telemetry import current_source, SOURCE_SECONDS
+
+# End-to-end time budget for one /analyze or /scan (seconds).
+# Callers may ask for less (or more, up to the max) per request.
+DEFAULT_BUDGET = float(os.getenv("ZIVA_REQUEST_BUDGET", "25"))
+MAX_BUDGET = float(os.getenv("ZIVA_MAX_REQUEST_BUDGET", "60"))
+# Below this every source would time out at once (and count against the retailers)
+MIN_BUDGET = float(os.getenv("ZIVA_MIN_REQUEST_BUDGET", "2"))
+
+# Share of the *remaining* budget each source may spend. Market sites get all of it,
+# the page scrape on /scan gets less so the hunters still have time afterwards.
+SOURCE_SHARES = {
+    "page": 0.4,
+    "ai": 0.6,
+    "history": 0.8,
+}
+
+
+def parse_budget(value):
+    # Client-supplied budget -> seconds clamped to [MIN_BUDGET, MAX_BUDGET], None = default.
+    # ValueError for anything that isn't a positive number.
+    if value is None or value == "": return None
+    if isinstance(value, bool): raise ValueError("budget must be a number of seconds")
+    try: seconds = float(value)
+    except (TypeError, ValueError): raise ValueError("budget must be a number of seconds")
+    if not math.isfinite(seconds) or seconds <= 0: raise ValueError("budget must be a positive number of seconds")
+    return min(max(seconds, MIN_BUDGET), MAX_BUDGET)
+
+
+class RequestBudget:
+    def __init__(self, seconds=None):
+        seconds = parse_budget(seconds)
+        self.seconds = DEFAULT_BUDGET if seconds is None else seconds
+        self.started = time.monotonic()
+
+    def remaining(self):
+        return max(0.0, self.seconds - (time.monotonic() - self.started))
+
+    def deadline_for(self, source):
+        return self.remaining() * SOURCE_SHARES.get(source, 1.0)
+
+
+async def run_with_deadline(label, job, timeout, sources, fallback=None):
+    # Awaits `job` for at most `timeout` seconds; on expiry it is cancelled and we
+    # hand back `fallback`. Status + timing land in sources[label] either way.
+    started = time.perf_counter()
+    status = "ok"
+    # Spans recorded inside `job` (and anything it spawns) are attributed to this source
+    token = current_source.set(label)
+    try:
+        value = await asyncio.wait_for(job, timeout)
+    except asyncio.TimeoutError:
+        print(f"⏱️ {label}: Timed out after {timeout:.1f}s")
+        value, status = fallback, "timed_out"
+    except Exception as e:
+        print(f"❌ {label}: {e}")
+        value, status = fallback, "error"
+    finally:
+        current_source.reset(token)
+
+    seconds = time.perf_counter() - started
+    SOURCE_SECONDS.observe(seconds, source=label, status=status)
+    meta = sources.setdefault(label, {})
+    meta["status"] = status
+    meta["ms"] = int(seconds * 1000)
+    return value
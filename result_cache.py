@@ -0,0 +1,124 @@
+import os
+import time
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# How long each source stays fresh (seconds).
+# Prices move fast, history barely moves, AI verdicts for a product almost never change.
+DEFAULT_TTLS = {
+    "market": 15 * 60,
+    "product": 15 * 60,
+    "history": 6 * 60 * 60,
+    "ai": 3 * 24 * 60 * 60,
+}
+
+
+class ResultCache:
+    # Tier 1: in-process LRU with per-source TTL (always on)
+    # Tier 2: SQLite file that survives restarts (on when ZIVA_CACHE_DB is set)
+    def __init__(self, max_entries=None, db_path=None, ttls=None):
+        self.max_entries = max_entries or int(os.getenv("ZIVA_CACHE_MAX_ENTRIES", "5000"))
+        self.ttls = dict(DEFAULT_TTLS)
+        for source in self.ttls:
+            override = os.getenv(f"ZIVA_TTL_{source.upper()}")
+            if override: self.ttls[source] = int(override)
+        if ttls: self.ttls.update(ttls)
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.db_path = db_path or os.getenv("ZIVA_CACHE_DB")
+        self._db = None
+        if self.db_path:
+            try:
+                self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("""
+                    CREATE TABLE IF NOT EXISTS results (
+                        source TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        PRIMARY KEY (source, key)
+                    )
+                """)
+                self._db.commit()
+                print(f"💾 Result Cache: Disk tier at {self.db_path}")
+            except Exception as e:
+                print(f"⚠️ Result Cache: Disk tier disabled ({e})")
+                self._db = None
+
+    def ttl_for(self, source):
+        return self.ttls.get(source, 10 * 60)
+
+    # --- READ ---
+    def get(self, source, key):
+        # Returns (hit, value) so a cached None/[] is distinguishable from a miss
+        if not key: return False, None
+        now = time.time()
+        slot = (source, key)
+
+        with self._lock:
+            entry = self._memory.get(slot)
+            if entry:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(slot)
+                    self.hits += 1
+                    return True, value
+                del self._memory[slot]
+
+            if self._db:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM results WHERE source = ? AND key = ?", slot
+                ).fetchone()
+                if row and row[1] > now:
+                    value = json.loads(row[0])
+                    self._remember(slot, row[1], value)
+                    self.hits += 1
+                    return True, value
+
+            self.misses += 1
+            return False, None
+
+    def expires_in(self, source, key):
+        # Seconds until the in-memory entry goes stale (None when we hold nothing)
+        with self._lock:
+            entry = self._memory.get((source, key))
+        if not entry: return None
+        return entry[0] - time.time()
+
+    # --- WRITE ---
+    def set(self, source, key, value, ttl=None):
+        if not key: return
+        expires_at = time.time() + (ttl or self.ttl_for(source))
+        slot = (source, key)
+        with self._lock:
+            self._remember(slot, expires_at, value)
+            if self._db:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO results (source, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                        (source, key, json.dumps(value), expires_at),
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    print(f"⚠️ Result Cache: Disk write failed ({e})")
+
+    def _remember(self, slot, expires_at, value):
+        self._memory[slot] = (expires_at, value)
+        self._memory.move_to_end(slot)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk": bool(self._db),
+        }
@@ -0,0 +1,330 @@
+import os
+import re
+import time
+from collections import deque
+from urllib.parse import quote_plus
+from product_match import ProductMatcher
+from fast_fetch import http_client, select_cards, site_url
+from telemetry import span
+from page_profile import profile_for
+from site_guard import site_guard, SiteBlocked
+
+# --- REGISTRY ---
+# Every retailer PriceHunter can scan is a RetailerAdapter registered here.
+ADAPTERS = {}
+
+def register(adapter_cls):
+    adapter = adapter_cls()
+    adapter.rebase(site_url(adapter.name, adapter.base_url))
+    ADAPTERS[adapter.name] = adapter
+    return adapter_cls
+
+
+def parse_price(text):
+    # "₹1,23,999.00" / "1,23,999 ₹1,49,999 17% off" -> 123999
+    if not text: return None
+    match = re.search(r'\d[\d,]*(?:\.\d+)?', str(text))
+    if not match: return None
+    try: return int(float(match.group(0).replace(",", "")))
+    except ValueError: return None
+
+
+# --- HEALTH ---
+class AdapterHealth:
+    # Rolling window of (ok, seconds). An adapter that keeps failing or keeps being slow
+    # is benched for a cooldown; after that ONE probe decides whether it comes back.
+    def __init__(self, window=20, min_samples=5, min_success=0.3, max_latency=12.0, cooldown=300):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.min_success = min_success
+        self.max_latency = max_latency
+        self.cooldown = cooldown
+        self.disabled_until = None
+        self.probing = False
+        self.last = None  # most recent (ok, seconds), survives a bench clearing the window
+
+    def enabled(self):
+        if self.disabled_until is None: return True
+        if time.time() < self.disabled_until: return False
+        self.disabled_until = None
+        self.probing = True
+        return True
+
+    def record(self, ok, seconds):
+        self.last = (ok, seconds)
+        self.samples.append((ok, seconds))
+        if self.probing:
+            self.probing = False
+            if not ok: self._disable("probe failed")
+            return
+
+        if len(self.samples) < self.min_samples: return
+        if self.success_rate() < self.min_success:
+            self._disable(f"success rate {self.success_rate():.0%}")
+        elif self.median_latency() > self.max_latency:
+            self._disable(f"median latency {self.median_latency():.1f}s")
+
+    def _disable(self, why):
+        self.disabled_until = time.time() + self.cooldown
+        self.samples.clear()
+        print(f"🚫 Adapter benched for {self.cooldown}s ({why})")
+
+    def success_rate(self):
+        if not self.samples: return 1.0
+        return sum(1 for ok, _ in self.samples if ok) / len(self.samples)
+
+    def median_latency(self):
+        if not self.samples: return 0.0
+        ordered = sorted(seconds for _, seconds in self.samples)
+        return ordered[len(ordered) // 2]
+
+    def stats(self):
+        return {
+            "enabled": self.disabled_until is None or time.time() >= self.disabled_until,
+            "samples": len(self.samples),
+            "success_rate": round(self.success_rate(), 2),
+            "median_latency": round(self.median_latency(), 2),
+        }
+
+
+# --- BASE ADAPTER ---
+class RetailerAdapter:
+    name = None            # key used in responses / SSE events ("flipkart")
+    label = None           # what users see ("Flipkart")
+    base_url = None        # prefix for relative links
+    search_url = None      # template with {query}
+    ready_selector = None  # something that only shows up once results rendered
+    card_selector = None
+    title_selector = None
+    price_selector = None
+    link_selector = "a"
+    cost = 1               # relative weight of one browser scrape (pages, JS, bandwidth)
+    http_first = True      # server-rendered results: try a plain GET before Chromium
+    goto_timeout = 15000
+    ready_timeout = 5000
+    min_match = 60
+
+    def __init__(self):
+        self.health = AdapterHealth()
+
+    @property
+    def profile(self):
+        # What the browser page may download + how long goto() waits (see page_profile.py)
+        return profile_for(self.name)
+
+    def rebase(self, base_url):
+        # Point the adapter at another host (the benchmark stand-in); no-op for the real one
+        if base_url == self.base_url: return
+        if self.search_url: self.search_url = self.search_url.replace(self.base_url, base_url)
+        self.base_url = base_url
+
+    def url_for(self, query):
+        return self.search_url.format(query=quote_plus(query))
+
+    def absolute(self, link):
+        if not link: return link
+        return link if link.startswith("http") else self.base_url + link
+
+    async def fast_search(self, query):
+        # No browser: GET the search page and read the same cards with BeautifulSoup
+        if not (self.http_first and self.search_url): return []
+        html = await http_client.get_text(self.url_for(query), site=self.name)
+        if not html: return []
+        with span("parse"):
+            cards = select_cards(html, self.card_selector, self.title_selector, self.price_selector, self.link_selector)
+        # No cards: genuinely no results, or a captcha / blank page (-> SiteBlocked)
+        if not cards: site_guard.check_page(self.name, html)
+        return cards
+
+    async def search(self, page, query):
+        # Default flow: open the search URL, wait for a result, read every card
+        print(f"🕵️‍♂️ Scanning {self.label} for '{query}'...")
+        await site_guard.acquire(self.name)
+        with span("goto"):
+            await page.goto(self.url_for(query), timeout=self.goto_timeout, wait_until=self.profile.wait_until)
+
+        try:
+            with span("wait_for_selector", selector=self.ready_selector or self.title_selector):
+                await site_guard.wait_ready(page, self.name, self.ready_selector or self.title_selector, self.ready_timeout)
+        except SiteBlocked: raise
+        except Exception: pass
+
+        return await self.read_cards(page)
+
+    async def read_cards(self, page):
+        # Every complete card currently on the page: [{title, price, link}]
+        with span("evaluate"):
+            return await page.eval_on_selector_all(self.card_selector, """
+                (elements, sel) => elements.map(el => {
+                    const titleEl = el.querySelector(sel.title);
+                    const priceEl = el.querySelector(sel.price);
+                    const linkEl = el.querySelector(sel.link);
+                    if (titleEl && priceEl) {
+                        return { title: titleEl.innerText, price: priceEl.innerText, link: linkEl ? linkEl.getAttribute('href') : null };
+                    }
+                    return null;
+                }).filter(item => item !== null)
+            """, {"title": self.title_selector, "price": self.price_selector, "link": self.link_selector})
+
+    def pick(self, query, candidates):
+        # Best variant-aware match across every card on the page, with its confidence
+        priced = [dict(item, price=parse_price(item.get('price'))) for item in candidates]
+        priced = [item for item in priced if item['price']]
+        best, confidence = ProductMatcher(query, min_score=self.min_match).best(priced)
+        if not best: return None
+
+        print(f"✅ Found on {self.label}: {best['title']} @ ₹{best['price']} (match {confidence:.0%})")
+        return {"site": self.label, "title": best['title'], "price": best['price'],
+                "link": self.absolute(best.get('link')), "match": confidence}
+
+
+# --- AGENT 1: FLIPKART ---
+@register
+class FlipkartAdapter(RetailerAdapter):
+    name = "flipkart"
+    label = "Flipkart"
+    base_url = "https://www.flipkart.com"
+    search_url = "https://www.flipkart.com/search?q={query}"
+    ready_selector = 'div.RG5Slk, div.KzDlHZ, div._4rR01T, a.s1Q9rs'
+    card_selector = 'div[data-id], div._1AtVbE'
+    title_selector = 'div.RG5Slk, div.KzDlHZ, div._4rR01T, a.s1Q9rs'
+    price_selector = 'div.hZ3P6w, div.DeU9vF, div.Nx9bqj, div._30jeq3'
+
+
+# --- AGENT 2: CROMA ---
+@register
+class CromaAdapter(RetailerAdapter):
+    # The site is client-rendered, but its search results come from a public JSON API:
+    # fast path = that API, browser = the results URL, last resort = homepage + typing.
+    name = "croma"
+    label = "Croma"
+    base_url = "https://www.croma.com"
+    search_url = "https://www.croma.com/searchB?q={query}%3Arelevance&text={query}"
+    api_host = "https://api.croma.com"
+    api_url = ("https://api.croma.com/searchservices/v1/search?currentPage=0&query={query}%3Arelevance"
+               "&fields=FULL&channel=WEB&channelCode=400049&spellOpt=DEFAULT")
+    ready_selector = 'li.product-item, div.product-item, div.cp-product-box'
+    card_selector = 'li.product-item, div.product-item, div.cp-product-box'
+    title_selector = 'h3.product-title, h3 a, .product-title a'
+    price_selector = '.amount, .new-price, .cp-price'
+    link_selector = 'h3 a, a'
+    cost = 2  # client-rendered page, heavier than the others when the API path misses
+    goto_timeout = 20000
+    ready_timeout = 10000
+
+    def rebase(self, base_url):
+        if base_url != self.base_url:
+            self.api_url = self.api_url.replace(self.api_host, base_url + "/api")
+        super().rebase(base_url)
+
+    async def fast_search(self, query):
+        data = await http_client.get_json(self.api_url.format(query=quote_plus(query)),
+                                          site=self.name, headers={"Accept": "application/json", "Origin": self.base_url,
+                                                                   "Referer": self.base_url + "/"})
+        if not data: return []
+        with span("parse"):
+            return self.parse_api(data)
+
+    @staticmethod
+    def parse_api(data):
+        # {"products": [{"name", "price": {"value"}, "url"}]} -> the same cards the page shows
+        cards = []
+        for product in (data or {}).get("products") or []:
+            price = product.get("price") or {}
+            value = price.get("value") if isinstance(price, dict) else price
+            if product.get("name") and value:
+                cards.append({"title": product["name"], "price": str(value), "link": product.get("url")})
+        return cards
+
+    async def search(self, page, query):
+        # Straight to the results URL; the homepage flow only when that shows nothing
+        cards = await super().search(page, query)
+        if cards: return cards
+        print("⚠️ Croma: Results URL came back empty, trying the homepage search box...")
+        return await self.search_from_homepage(page, query)
+
+    async def search_from_homepage(self, page, query):
+        await site_guard.acquire(self.name)
+        with span("goto", page="home"):
+            await page.goto(self.base_url + "/", timeout=self.goto_timeout, wait_until=self.profile.wait_until)
+
+        # 1. POPUP KILLER
+        try:
+            # Press ESCAPE to close "Select Pincode" or "Login" popups
+            await page.keyboard.press("Escape")
+        except Exception: pass
+
+        # 2. FIND SEARCH BAR (The "Dumb" Strategy)
+        # We look for ANY visible text input. The search bar is usually the first one in the header.
+        try:
+            with span("wait_for_selector", selector="search input"):
+                search_input = await page.wait_for_selector('input[type="text"], input[type="search"]', state="visible", timeout=10000)
+
+            if search_input:
+                await search_input.click()
+                await search_input.fill(query)
+                await search_input.press("Enter")
+                print("✅ Croma: Search query submitted.")
+            else:
+                print("❌ Croma: No search bar found.")
+                return []
+
+            # 3. WAIT FOR RESULTS
+            with span("wait_for_selector", selector=self.card_selector):
+                await site_guard.wait_ready(page, self.name, self.card_selector, 15000)
+
+        except SiteBlocked: raise
+        except Exception as e:
+            print(f"❌ Croma Navigation Failed: {e}")
+            return []
+
+        # 4. SCRAPE DATA (every card, the matcher picks)
+        cards = await self.read_cards(page)
+        if not cards: print("❌ Croma: Results loaded but scraper couldn't read data.")
+        return cards
+
+
+# --- AGENT 3: AMAZON ---
+@register
+class AmazonAdapter(RetailerAdapter):
+    name = "amazon"
+    label = "Amazon"
+    base_url = "https://www.amazon.in"
+    search_url = "https://www.amazon.in/s?k={query}"
+    card_selector = 'div[data-component-type="s-search-result"]'
+    title_selector = 'h2 span, h2'
+    price_selector = '.a-price .a-offscreen, .a-price-whole'
+    link_selector = 'h2 a, a.a-link-normal'
+
+
+# --- AGENT 4: RELIANCE DIGITAL ---
+@register
+class RelianceDigitalAdapter(RetailerAdapter):
+    name = "reliance"
+    label = "Reliance Digital"
+    base_url = "https://www.reliancedigital.in"
+    search_url = "https://www.reliancedigital.in/search?q={query}"
+    card_selector = 'li.grid, div.product-card'
+    title_selector = 'p.sp__name, .product-card-title'
+    price_selector = 'span.TextWeb__Text-sc-1cyx778-0, .price'
+
+
+# --- AGENT 5: VIJAY SALES ---
+@register
+class VijaySalesAdapter(RetailerAdapter):
+    name = "vijaysales"
+    label = "Vijay Sales"
+    base_url = "https://www.vijaysales.com"
+    search_url = "https://www.vijaysales.com/search-listing?q={query}"
+    card_selector = 'div.product-card'
+    title_selector = '.product-name'
+    price_selector = '.discountedPrice, .product__price--price'
+
+
+def enabled_adapters():
+    # ZIVA_RETAILERS="flipkart,croma" restricts the set; benched adapters are skipped
+    wanted = os.getenv("ZIVA_RETAILERS")
+    names = [n.strip() for n in wanted.split(",")] if wanted else list(ADAPTERS)
+    adapters = [ADAPTERS[n] for n in names if n in ADAPTERS]
+    # Cheapest first, so the fast answers start (and stream) first
+    return sorted((a for a in adapters if a.health.enabled()), key=lambda a: a.cost)
@@ -0,0 +1,212 @@
+import re
+import math
+from collections import Counter
+
+# --- LOCAL SCAM PRE-SCREEN ---
+# Deterministic checks that answer the obvious cases ("16TB SSD for ₹1,500", brand names
+# like "XQZRTK") in microseconds. Only ambiguous products go on to Gemini.
+
+# Brands we never treat as gibberish
+KNOWN_BRANDS = {
+    "apple", "samsung", "oneplus", "xiaomi", "redmi", "poco", "realme", "oppo", "vivo", "iqoo",
+    "motorola", "moto", "nokia", "google", "pixel", "nothing", "honor", "huawei", "asus", "acer",
+    "lenovo", "hp", "dell", "msi", "lg", "sony", "boat", "jbl", "bose", "sennheiser", "noise",
+    "boult", "philips", "panasonic", "tcl", "mi", "sandisk", "kingston", "crucial", "wd",
+    "western", "seagate", "toshiba", "hikvision", "adata", "transcend", "lexar", "corsair",
+    "logitech", "zebronics", "ambrane", "anker", "mivi", "croma", "amazonbasics", "intel", "amd",
+    "nikon", "canon", "fujifilm", "gopro", "dji", "garmin", "fitbit", "amazfit", "fire-boltt",
+    "microsoft", "infinix", "tecno", "lava", "micromax", "itel", "haier", "whirlpool", "godrej",
+    "voltas", "daikin", "bajaj", "havells", "prestige", "kent", "dyson", "eureka", "ifb",
+}
+
+# Minimum believable price (₹) per unit of the headline spec, by category.
+# Below `impossible` it's a scam; below `suspicious` it needs a closer look.
+PRICE_BANDS = {
+    "ssd":       {"unit": "gb",  "impossible": 1.5,  "suspicious": 3.0},
+    "hdd":       {"unit": "gb",  "impossible": 0.8,  "suspicious": 1.8},
+    "flash":     {"unit": "gb",  "impossible": 0.4,  "suspicious": 0.9},   # pendrives, microSD
+    "powerbank": {"unit": "mah", "impossible": 0.02, "suspicious": 0.04},
+    "tv":        {"unit": "inch", "impossible": 100,  "suspicious": 180},
+}
+
+# Flat floors for whole devices (₹), keyed by category and RAM where it matters
+DEVICE_FLOORS = {
+    "phone":  {"impossible": 2000, "suspicious": 4000, "ram_floor": {8: 7000, 12: 12000, 16: 18000}},
+    "laptop": {"impossible": 6000, "suspicious": 12000, "ram_floor": {16: 25000, 32: 45000}},
+}
+
+CATEGORY_LABELS = {
+    "ssd": "SSD", "hdd": "hard drive", "flash": "flash drive or memory card", "powerbank": "power bank",
+    "tv": "TV", "laptop": "laptop", "phone": "phone",
+}
+
+# Whole devices first: "laptop with 512GB SSD" is priced as a laptop, not as its SSD
+CATEGORY_PATTERNS = [
+    ("laptop",    r'laptop|notebook|macbook|chromebook'),
+    ("phone",     r'(?<!feature )(?<!keypad )\bphone\b|smartphone|iphone|galaxy [amsz]\d'),
+    ("tv",        r'\btv\b|television'),
+    ("ssd",       r'\bssd\b|\bnvme\b|solid state'),
+    ("hdd",       r'\bhdd\b|hard (disk|drive)'),
+    ("flash",     r'pen ?drive|flash drive|usb (stick|drive)|micro ?sd|memory card|\bsdxc\b|\bsdhc\b'),
+    ("powerbank", r'power ?bank'),
+]
+# Hints too loose to be sure of (5G routers, dongles): a guess, never a confident verdict
+WEAK_PATTERNS = [
+    ("phone",     r'\b5g\b'),
+]
+# "iPhone 15 case", "laptop backpack": named after a device, priced like an accessory
+ACCESSORY = re.compile(r'\b(cases?|covers?|adapters?|chargers?|bags?|backpacks?|stands?|skins?|protectors?'
+                       r'|cables?|sleeves?|pouch(es)?|mounts?|holders?|tempered glass|enclosures?)\b')
+# Whatever follows these describes what the product goes with, not what it is
+CONTEXT_SPLIT = re.compile(r'\b(?:for|with|compatible|fits|includes?)\b')
+
+
+# --- FEATURE EXTRACTION ---
+def classify(title):
+    # (category, weak) for the product the title names itself; (None, False) for accessories
+    lower = title.lower()
+    subject = CONTEXT_SPLIT.split(lower, 1)[0].strip() or lower
+    if ACCESSORY.search(subject): return None, False
+    for category, pattern in CATEGORY_PATTERNS:
+        if re.search(pattern, subject): return category, False
+    for category, pattern in WEAK_PATTERNS:
+        if re.search(pattern, subject): return category, True
+    return None, False
+
+def extract_specs(title):
+    lower = title.lower()
+    specs = {}
+
+    ram = re.search(r'(\d+)\s*gb\s*(?:of\s*)?ram', lower)
+    if ram: specs["ram_gb"] = int(ram.group(1))
+
+    # Storage = largest capacity that isn't the RAM figure
+    capacities = []
+    for number, unit in re.findall(r'(\d+(?:\.\d+)?)\s*(tb|gb)\b(?!\s*(?:of\s*)?ram)', lower):
+        capacities.append(float(number) * (1024 if unit == "tb" else 1))
+    if capacities: specs["storage_gb"] = max(capacities)
+
+    mah = re.search(r'(\d[\d,]*)\s*mah', lower)
+    if mah: specs["mah"] = int(mah.group(1).replace(",", ""))
+
+    inches = re.search(r'(\d{2,3})\s*(?:inch|in\b|"|cm)', lower)
+    if inches:
+        size = int(inches.group(1))
+        specs["inch"] = round(size / 2.54) if "cm" in inches.group(0) else size
+
+    return specs
+
+def describe(amount, unit):
+    if unit == "gb": return f"{amount / 1024:g}TB" if amount >= 1024 else f"{amount:g}GB"
+    if unit == "mah": return f"{amount:,}mAh"
+    return f'{amount}"'
+
+def brand_of(title):
+    words = re.findall(r"[A-Za-z][A-Za-z\-]+", title)
+    return words[0].lower() if words else ""
+
+def gibberish_score(word):
+    # 0 = reads like a name, 1 = keyboard mash. Mixes vowel ratio, consonant runs and entropy.
+    letters = re.sub(r'[^a-z]', '', word.lower())
+    if len(letters) < 4 or letters in KNOWN_BRANDS: return 0.0
+
+    vowels = sum(1 for c in letters if c in "aeiouy")
+    vowel_ratio = vowels / len(letters)
+    longest_run = max(len(run) for run in re.findall(r'[^aeiouy]+', letters) or [""])
+    counts = Counter(letters)
+    entropy = -sum((n / len(letters)) * math.log2(n / len(letters)) for n in counts.values())
+
+    score = 0.0
+    if vowel_ratio < 0.2: score += 0.45
+    if longest_run >= 4: score += 0.35
+    if entropy > 3.0 and len(letters) <= 10: score += 0.2
+    if word.isupper() and len(letters) >= 6 and vowel_ratio < 0.3: score += 0.2
+    return min(score, 1.0)
+
+
+def as_number(value):
+    # Prices / review counts from clients: 1499, 1499.0, "1,499", "₹999" -> number, junk -> 0
+    if isinstance(value, bool): return 0
+    if isinstance(value, (int, float)): return value if math.isfinite(value) and value > 0 else 0
+    match = re.search(r'\d[\d,]*(?:\.\d+)?', str(value or ""))
+    if not match: return 0
+    number = float(match.group(0).replace(",", ""))
+    return int(number) if number.is_integer() else number
+
+
+# --- SCORING ---
+def assess(title, price=0, reviews=0):
+    # Always returns a verdict; "confident" says whether it can skip the LLM
+    title = title or ""
+    price = as_number(price)
+    reviews = as_number(reviews)
+    category, weak = classify(title)
+    specs = extract_specs(title)
+    brand = brand_of(title)
+    known_brand = brand in KNOWN_BRANDS
+    red_flags = []
+    price_ok = None
+
+    # 1. Price per spec
+    band = PRICE_BANDS.get(category)
+    if band and price > 0:
+        amount = {"gb": specs.get("storage_gb"), "mah": specs.get("mah"), "inch": specs.get("inch")}[band["unit"]]
+        if amount:
+            per_unit = price / amount
+            spec = describe(amount, band["unit"])
+            if per_unit < band["impossible"]:
+                red_flags.append(("impossible", f"₹{price:,} for a {spec} {CATEGORY_LABELS[category]} is far below any real one"))
+            elif per_unit < band["suspicious"]:
+                red_flags.append(("soft", f"₹{price:,} is unusually cheap for a {spec} {CATEGORY_LABELS[category]}"))
+            else:
+                price_ok = True
+
+    floor = DEVICE_FLOORS.get(category)
+    if floor and price > 0:
+        ram_floor = max((v for ram, v in floor["ram_floor"].items() if specs.get("ram_gb", 0) >= ram), default=0)
+        if price < floor["impossible"] or (ram_floor and price < ram_floor / 2):
+            red_flags.append(("weak" if weak else "impossible", f"₹{price:,} is not a realistic price for this {category}"))
+        elif price < max(floor["suspicious"], ram_floor):
+            red_flags.append(("weak" if weak else "soft", f"₹{price:,} is low for this {category}"))
+        elif price_ok is None:
+            price_ok = True
+
+    # 2. Brand name
+    gibberish = gibberish_score(brand) if brand and not known_brand else 0.0
+    if gibberish >= 0.6:
+        red_flags.append(("soft", f"'{brand}' looks like a made-up brand name"))
+
+    # 3. Social proof
+    strong_reviews = reviews >= 1000
+    some_reviews = reviews >= 100
+
+    # --- DECISION ---
+    impossible = [why for kind, why in red_flags if kind == "impossible"]
+    soft = [why for kind, why in red_flags if kind == "soft"]
+    hints = [why for kind, why in red_flags if kind == "weak"]
+
+    if impossible and not strong_reviews:
+        return {"verdict": "SUSPICIOUS", "score": 20, "confident": True, "engine": "rules",
+                "reason": impossible[0] + "."}
+    if len(soft) >= 2 and not some_reviews:
+        return {"verdict": "SUSPICIOUS", "score": 35, "confident": True, "engine": "rules",
+                "reason": "; ".join(soft) + "."}
+    if not red_flags and known_brand and (strong_reviews or (some_reviews and price_ok)):
+        return {"verdict": "SAFE", "score": 90, "confident": True, "engine": "rules",
+                "reason": f"Established brand, {reviews:,} reviews and specs consistent with the price."}
+
+    # Ambiguous: best local guess, flagged as not confident
+    if red_flags:
+        return {"verdict": "SUSPICIOUS", "score": 45, "confident": False, "engine": "heuristic",
+                "reason": (impossible or soft or hints)[0] + " (quick check)."}
+    if some_reviews or known_brand:
+        return {"verdict": "SAFE", "score": 70, "confident": False, "engine": "heuristic",
+                "reason": "No red flags in the title, price or reviews (quick check)."}
+    return {"verdict": "UNKNOWN", "score": 50, "confident": False, "engine": "heuristic",
+            "reason": "Not enough signals for a quick verdict."}
+
+def prescreen(title, price=0, reviews=0):
+    # The verdict when the rules are sure, None when the LLM should decide
+    verdict = assess(title, price, reviews)
+    if not verdict.pop("confident"): return None
+    return verdict
@@ -1,3 +1,85 @@
+const ZIVA_API = 'https://ziva-brain.onrender.com';
+
+// --- RENDER HELPERS ---
+function renderVerdict(state) {
+    if (!state.ai) {
+        return `
+            <div style="border-left: 4px solid #666; padding-left: 10px;">
+                <h3 style="margin: 0; color: #666;">⏳ Analyzing...</h3>
+                <p style="margin: 5px 0 0 0; font-size: 0.9em;">${state.product}</p>
+            </div>`;
+    }
+
+    // UI Colors
+    let color = "#3fb950"; // Green
+    if (state.ai.verdict.includes("SUSPICIOUS")) color = "#d29922"; // Yellow
+    if (state.ai.verdict.includes("HIGH RISK")) color = "#f85149"; // Red
+    const icon = (state.ai.verdict.includes("SAFE")) ? "✅" : "⚠️";
+
+    return `
+        <div style="border-left: 4px solid ${color}; padding-left: 10px;">
+            <h3 style="margin: 0; color: ${color};">${icon} ${state.ai.verdict}</h3>
+            <p style="margin: 5px 0 0 0; font-size: 0.9em;">${state.product}</p>
+            <p style="margin: 5px 0 0 0; font-size: 0.8em; opacity: 0.8;">${state.ai.reason}</p>
+        </div>`;
+}
+
+function renderHistory(history) {
+    if (!history || !history.lowest) return "";
+    return `
+        <div style="margin-top: 10px; padding-top: 10px; border-top: 1px dashed #ccc;">
+            <div style="font-size: 11px; color: #666; margin-bottom: 5px;">📉 PRICE HISTORY</div>
+            <div style="display: flex; justify-content: space-between;">
+                <span>Lowest Ever:</span>
+                <span style="font-weight: bold; color: #3fb950;">₹${history.lowest.toLocaleString()}</span>
+            </div>
+            <div style="display: flex; justify-content: space-between;">
+                <span>Average:</span>
+                <span>₹${history.average.toLocaleString()}</span>
+            </div>
+        </div>`;
+}
+
+function renderMarket(competitors, currentPrice) {
+    if (!competitors || competitors.length === 0) return "";
+    let marketHtml = `<div style="margin-top: 10px; padding-top: 10px; border-top: 1px dashed #ccc;">
+        <div style="font-size: 11px; color: #666; margin-bottom: 5px;">💰 COMPETITORS</div>`;
+
+    competitors.forEach(comp => {
+        let priceStyle = "font-weight: bold;";
+        // Highlight if cheaper than current found price
+        if (currentPrice > 0 && comp.price < currentPrice) {
+            priceStyle += " color: #d29922; text-decoration: underline;";
+        }
+
+        marketHtml += `
+        <div style="display: flex; justify-content: space-between; margin-bottom: 5px;">
+            <span>${comp.site}</span>
+            <div>
+                <span style="${priceStyle}">₹${comp.price.toLocaleString()}</span>
+                <a href="${comp.link}" target="_blank" style="margin-left: 5px;">↗</a>
+            </div>
+        </div>`;
+    });
+    return marketHtml + `</div>`;
+}
+
+function renderPending(pending) {
+    if (pending.length === 0) return "";
+    return `<p style="margin-top: 10px; font-size: 0.8em; opacity: 0.7;">📡 Still checking: ${pending.join(", ")}...</p>`;
+}
+
+function render(resultBox, state) {
+    if (state.ai) resultBox.className = (state.ai.verdict.includes("SAFE")) ? "safe" : "scam";
+    resultBox.innerHTML = `
+        ${renderVerdict(state)}
+        ${renderHistory(state.history)}
+        ${renderMarket(state.competitors, state.current_price)}
+        ${renderPending(state.pending)}
+    `;
+}
+
+// --- MAIN ---
 async function scanLink() {
     var link = document.getElementById("userInput").value;
     var resultBox = document.getElementById("result-box");
@@ -10,88 +92,72 @@ async function scanLink() {
 
     // UI: Show Loading State
     resultBox.style.display = "block";
-    resultBox.className = ""; 
+    resultBox.className = "";
     resultBox.innerHTML = "📡 <strong>SCANNING:</strong> Ziva is analyzing market data...<br><em>(Checking Amazon, Flipkart, Croma & History)</em>";
     button.disabled = true;
     button.innerText = "Scanning...";
 
-    try {
-        const response = await fetch('https://ziva-brain.onrender.com/scan', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ url: link })
-        });
-
-        const data = await response.json();
-
+    const done = () => {
         button.disabled = false;
         button.innerText = "Ask Ziva";
+    };
 
-        // UI Colors
-        let color = "#3fb950"; // Green
-        if (data.verdict.includes("SUSPICIOUS")) color = "#d29922"; // Yellow
-        if (data.verdict.includes("HIGH RISK")) color = "#f85149"; // Red
-        const icon = (data.verdict.includes("SAFE")) ? "✅" : "⚠️";
-
-        // History Section
-        let historyHtml = "";
-        if (data.history && data.history.lowest) {
-            historyHtml = `
-            <div style="margin-top: 10px; padding-top: 10px; border-top: 1px dashed #ccc;">
-                <div style="font-size: 11px; color: #666; margin-bottom: 5px;">📉 PRICE HISTORY</div>
-                <div style="display: flex; justify-content: space-between;">
-                    <span>Lowest Ever:</span>
-                    <span style="font-weight: bold; color: #3fb950;">₹${data.history.lowest.toLocaleString()}</span>
-                </div>
-                <div style="display: flex; justify-content: space-between;">
-                    <span>Average:</span>
-                    <span>₹${data.history.average.toLocaleString()}</span>
-                </div>
-            </div>`;
-        }
+    // Results arrive source by source (Server-Sent Events), so we paint as they land
+    const state = { product: link, current_price: 0, ai: null, history: null, competitors: [], pending: [] };
+    const stream = new EventSource(`${ZIVA_API}/scan/stream?url=${encodeURIComponent(link)}`);
+    let finished = false;
 
-        // Market Section
-        let marketHtml = "";
-        if (data.competitors && data.competitors.length > 0) {
-            marketHtml = `<div style="margin-top: 10px; padding-top: 10px; border-top: 1px dashed #ccc;">
-                <div style="font-size: 11px; color: #666; margin-bottom: 5px;">💰 COMPETITORS</div>`;
-            
-            data.competitors.forEach(comp => {
-                let priceStyle = "font-weight: bold;";
-                // Highlight if cheaper than current found price
-                if (data.current_price > 0 && comp.price < data.current_price) {
-                    priceStyle += " color: #d29922; text-decoration: underline;";
-                }
-
-                marketHtml += `
-                <div style="display: flex; justify-content: space-between; margin-bottom: 5px;">
-                    <span>${comp.site}</span>
-                    <div>
-                        <span style="${priceStyle}">₹${comp.price.toLocaleString()}</span>
-                        <a href="${comp.link}" target="_blank" style="margin-left: 5px;">↗</a>
-                    </div>
-                </div>`;
+    stream.addEventListener("product", (e) => {
+        const data = JSON.parse(e.data);
+        state.product = data.product;
+        state.current_price = data.current_price;
+        render(resultBox, state);
+    });
+
+    // "plan" lists every source the server is about to run
+    stream.addEventListener("plan", (e) => {
+        state.pending = JSON.parse(e.data);
+        state.pending.forEach(name => {
+            stream.addEventListener(name, (ev) => {
+                const data = JSON.parse(ev.data);
+                state.pending = state.pending.filter(p => p !== name);
+                if (name === "ai") state.ai = data;
+                else if (name === "history") state.history = data;
+                else if (data && data.price) state.competitors.push(data);
+                render(resultBox, state);
             });
-            marketHtml += `</div>`;
-        }
+        });
+        render(resultBox, state);
+    });
 
-        // Final HTML
-        resultBox.className = (data.verdict.includes("SAFE")) ? "safe" : "scam";
-        resultBox.innerHTML = `
-            <div style="border-left: 4px solid ${color}; padding-left: 10px;">
-                <h3 style="margin: 0; color: ${color};">${icon} ${data.verdict}</h3>
-                <p style="margin: 5px 0 0 0; font-size: 0.9em;">${data.product}</p>
-                <p style="margin: 5px 0 0 0; font-size: 0.8em; opacity: 0.8;">${data.reason}</p>
-            </div>
-            ${historyHtml}
-            ${marketHtml}
-        `;
+    stream.addEventListener("final", (e) => {
+        finished = true;
+        stream.close();
+        const data = JSON.parse(e.data);
+        Object.assign(state, {
+            product: data.product,
+            current_price: data.current_price,
+            ai: { verdict: data.verdict, reason: data.reason },
+            history: data.history,
+            competitors: data.competitors,
+            pending: [],
+        });
+        render(resultBox, state);
+        done();
+    });
 
-    } catch (error) {
+    stream.onerror = (error) => {
+        if (finished) return;
+        stream.close();
         console.error("Error:", error);
-        resultBox.className = "scam";
-        resultBox.innerHTML = "<strong>❌ SERVER ERROR</strong><br>The Ziva Brain is offline or timed out.<br>Try again in 30 seconds.";
-        button.disabled = false;
-        button.innerText = "Ask Ziva";
-    }
-}
\ No newline at end of file
+        if (!state.ai) {
+            resultBox.className = "scam";
+            resultBox.innerHTML = "<strong>❌ SERVER ERROR</strong><br>The Ziva Brain is offline or timed out.<br>Try again in 30 seconds.";
+        } else {
+            // Keep whatever already arrived
+            state.pending = [];
+            render(resultBox, state);
+        }
+        done();
+    };
+}
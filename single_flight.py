@@ -0,0 +1,49 @@
+import asyncio
+
+
+class _Flight:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    # Concurrent callers asking for the same key share ONE running task.
+    # When the last waiter gives up (cancelled/timed out) the shared task is cancelled too,
+    # so a flight never keeps a browser busy for nobody.
+    def __init__(self):
+        self._flights = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key, fetch):
+        # Returns (value, shared) - shared is True when we piggybacked on someone else's run
+        flight = self._flights.get(key)
+        shared = flight is not None
+
+        if shared:
+            self.coalesced += 1
+        else:
+            self.started += 1
+            flight = _Flight(asyncio.create_task(fetch()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def _forget(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self):
+        return {
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,189 @@
+import os
+import time
+import asyncio
+from bs4 import BeautifulSoup
+from telemetry import metrics
+
+# --- SITE GUARD ---
+# Under load retailers answer with captchas, 403/429s or blank pages instead of results.
+# Every hunter in the process goes through one token bucket per site, block pages are
+# recognised by their content (so they fail in milliseconds, not after a 15 s selector wait),
+# and a site that blocks us is left alone for a growing backoff while callers serve what
+# we already know (cache / price store).
+
+SITE_BLOCKS = metrics.counter("ziva_site_blocks_total", "Block / captcha / empty pages detected, per site and signature.")
+SITE_WAITS = metrics.counter("ziva_site_throttle_seconds_total", "Seconds hunters waited on a site's token bucket.")
+
+# Answers that mean "slow down", whatever the body says
+BLOCK_STATUSES = {403, 429, 503}
+
+# Elements only challenge pages have (checked in BeautifulSoup and in the live page)
+BLOCK_SELECTOR = ", ".join([
+    'form[action*="validateCaptcha"]',      # Amazon robot check
+    '#px-captcha', '[id^="px-captcha"]',    # PerimeterX
+    '#challenge-form', '#cf-challenge-running', '.cf-browser-verification',  # Cloudflare
+    'iframe[src*="recaptcha"]', '.g-recaptcha',
+    'iframe[src*="hcaptcha"]', '.h-captcha',
+    'iframe[src*="captcha-delivery.com"]',  # DataDome
+])
+# Phrases from the title / first screen of challenge and denial pages (lowercase)
+BLOCK_PHRASES = (
+    "enter the characters you see below",
+    "not a robot",
+    "are you a human",
+    "verify you are human",
+    "press & hold",
+    "unusual traffic",
+    "access denied",
+    "you don't have permission to access",
+    "request blocked",
+    "too many requests",
+    "checking your browser",
+)
+# A rendered results page with less visible text than this is a blank page. Browser only:
+# over plain HTTP a client-rendered shell is legitimately almost empty.
+MIN_PAGE_TEXT = 40
+
+
+class SiteBlocked(Exception):
+    def __init__(self, site, reason):
+        super().__init__(f"{site} is blocking us ({reason})")
+        self.site = site
+        self.reason = reason
+
+
+def detect_block(html):
+    # Signature name when `html` is a captcha / denial page, else None.
+    # Only ask this of pages that didn't give us results: real pages may embed a captcha widget.
+    soup = BeautifulSoup(html or "", "html.parser")
+    if soup.select_one(BLOCK_SELECTOR): return "captcha"
+    for tag in soup(["script", "style", "noscript"]): tag.decompose()
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
+    text = soup.get_text(" ", strip=True)
+    screen = f"{title} {text[:2000]}".lower()
+    return next((p for p in BLOCK_PHRASES if p in screen), None)
+
+# Same test against the live DOM, polled while we wait for results to render.
+# Ready = `ready` matches an element, or the page text contains `readyText`.
+_LIVE_CHECK = """([ready, readyText, blockSelector, phrases]) => {
+    if (ready && document.querySelector(ready)) return "ready";
+    const body = document.body ? document.body.innerText : "";
+    if (readyText && body.includes(readyText)) return "ready";
+    if (document.querySelector(blockSelector)) return "blocked:captcha";
+    const screen = (document.title + " " + body.slice(0, 2000)).toLowerCase();
+    const phrase = phrases.find(p => screen.includes(p));
+    return phrase ? "blocked:" + phrase : false;
+}"""
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def take(self):
+        # Waits (in FIFO order, thanks to the lock) until a token is free; returns seconds waited
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                pause = (1 - self.tokens) / self.rate
+                await asyncio.sleep(pause)
+                waited += pause
+                self._refill()
+            self.tokens -= 1
+        return waited
+
+
+class SiteGuard:
+    def __init__(self, rate=None, burst=None, backoff=None, max_backoff=None):
+        # Requests per second per site (ZIVA_SITE_RATE_FLIPKART=0.5 overrides one site)
+        self.rate = rate or float(os.getenv("ZIVA_SITE_RATE", "2"))
+        self.burst = burst or float(os.getenv("ZIVA_SITE_BURST", "4"))
+        # First block: `backoff` seconds, doubling on every block in a row up to `max_backoff`
+        self.backoff = backoff or float(os.getenv("ZIVA_BLOCK_BACKOFF", "60"))
+        self.max_backoff = max_backoff or float(os.getenv("ZIVA_BLOCK_MAX_BACKOFF", "900"))
+        self._buckets = {}
+        self._strikes = {}
+        self._until = {}
+        self.blocks = 0
+
+    def bucket(self, site):
+        if site not in self._buckets:
+            rate = float(os.getenv(f"ZIVA_SITE_RATE_{site.upper()}", self.rate))
+            self._buckets[site] = TokenBucket(rate, max(1.0, self.burst))
+        return self._buckets[site]
+
+    # --- BACKOFF ---
+    def backing_off(self, site):
+        # Seconds until we talk to `site` again (0 = go ahead)
+        return max(0.0, self._until.get(site, 0) - time.time())
+
+    def report_block(self, site, reason):
+        strikes = self._strikes.get(site, 0) + 1
+        self._strikes[site] = strikes
+        wait = min(self.max_backoff, self.backoff * 2 ** (strikes - 1))
+        self._until[site] = max(self._until.get(site, 0), time.time() + wait)
+        self.blocks += 1
+        SITE_BLOCKS.inc(site=site, signature=reason)
+        print(f"🧱 {site}: Blocked ({reason}), backing off for {wait:.0f}s")
+        return SiteBlocked(site, reason)
+
+    def report_ok(self, site):
+        self._strikes.pop(site, None)
+
+    def hold(self, site, seconds):
+        # Mirror a backoff decided elsewhere (a hunter process) without adding a strike
+        self._until[site] = max(self._until.get(site, 0), time.time() + seconds)
+
+    # --- HUNTER HOOKS ---
+    async def acquire(self, site):
+        # Before every request to `site`: fail fast while backing off, else wait for a token
+        remaining = self.backing_off(site)
+        if remaining: raise SiteBlocked(site, f"backing off for {remaining:.0f}s")
+        waited = await self.bucket(site).take()
+        if waited: SITE_WAITS.inc(waited, site=site)
+
+    def check_page(self, site, html):
+        # Called on a page that gave us no results: raise if it's a block page
+        reason = detect_block(html)
+        if reason: raise self.report_block(site, reason)
+
+    def check_status(self, site, status):
+        if status in BLOCK_STATUSES: raise self.report_block(site, f"HTTP {status}")
+
+    async def wait_ready(self, page, site, selector, timeout, text=None):
+        # wait_for_selector (or for `text` to show up) that gives up as soon as a challenge page
+        # shows instead. A timeout on a page with (next to) no text is reported as a blank-page block.
+        try:
+            handle = await page.wait_for_function(
+                _LIVE_CHECK, arg=[selector, text, BLOCK_SELECTOR, list(BLOCK_PHRASES)],
+                polling=250, timeout=timeout,
+            )
+        except Exception:
+            text = await page.evaluate("() => document.body ? document.body.innerText.trim().length : 0")
+            if text < MIN_PAGE_TEXT: raise self.report_block(site, "empty page")
+            raise
+        state = await handle.json_value()
+        if state.startswith("blocked:"): raise self.report_block(site, state.split(":", 1)[1])
+
+    def stats(self):
+        sites = set(self._buckets) | set(self._until)
+        return {
+            "blocks": self.blocks,
+            "sites": {site: {"backoff_s": round(self.backing_off(site)), "strikes": self._strikes.get(site, 0),
+                             "tokens": round(self._buckets[site].tokens, 1) if site in self._buckets else None}
+                      for site in sorted(sites)},
+        }
+
+
+# One per process, shared by every hunter (in hunter-process mode each child has its own)
+site_guard = SiteGuard()
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import threading
+from contextvars import ContextVar
+from contextlib import contextmanager
+
+# --- TRACING + METRICS ---
+# Each HTTP request gets a trace; `span()` times one stage (page.goto, a selector wait,
+# the Gemini call...) and tags it with the source that was running it. Durations feed
+# Prometheus-style histograms served at /metrics, so p99 can be pinned on a site + stage.
+
+# Seconds. Scrapes live in the 0.1-30s range, parsing in the milliseconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 20, 30, 60)
+
+# Print every finished trace as one JSON line (or only those slower than N ms)
+TRACE_LOG = os.getenv("ZIVA_TRACE_LOG", "0") == "1"
+TRACE_SLOW_MS = float(os.getenv("ZIVA_TRACE_SLOW_MS", "0"))
+
+current_trace = ContextVar("ziva_trace", default=None)
+current_source = ContextVar("ziva_source", default="request")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_text(labels):
+    if not labels: return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_label_text(key + (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_label_text(key + (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_label_text(key)} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{_label_text(key)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    # Read at scrape time from a callback returning a number or {labels_dict_items: value}
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try: values = self.read()
+        except Exception: return lines
+        if not isinstance(values, dict): values = {(): values}
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_label_text(key)} {float(value):g}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text):
+        metric = Counter(name, help_text)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, buckets=BUCKETS):
+        metric = Histogram(name, help_text, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help_text, read):
+        metric = Gauge(name, help_text, read)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Registry()
+REQUEST_SECONDS = metrics.histogram("ziva_request_seconds", "End-to-end HTTP request latency.")
+SOURCE_SECONDS = metrics.histogram("ziva_source_seconds", "Latency of each intel source (ai, history, one per retailer).")
+SPAN_SECONDS = metrics.histogram("ziva_span_seconds", "Latency of individual stages (browser launch, goto, selector waits, Gemini...).")
+SCRAPES = metrics.counter("ziva_scrapes_total", "Retailer/history lookups by outcome.")
+
+
+# --- TRACES ---
+class Trace:
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def finish(self, status, route=None):
+        seconds = time.perf_counter() - self.started
+        # Labelled by route template ("/jobs/{job_id}"), never the raw path: one label per endpoint
+        REQUEST_SECONDS.observe(seconds, path=route or "unmatched", status=status)
+        ms = seconds * 1000
+        if TRACE_LOG or (TRACE_SLOW_MS and ms >= TRACE_SLOW_MS):
+            print(json.dumps({"trace": self.id, "path": self.name, "status": status, "ms": int(ms),
+                              "spans": self.spans}))
+
+
+@contextmanager
+def span(name, **attrs):
+    # Times one stage; works in sync and async code (`with span("goto"): await page.goto(...)`)
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        status = "cancelled"
+        raise
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        source = current_source.get()
+        SPAN_SECONDS.observe(seconds, span=name, source=source)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.spans.append(dict(attrs, span=name, source=source, status=status,
+                                    start_ms=int((started - trace.started) * 1000), ms=round(seconds * 1000, 1)))
+
+
+class TracingMiddleware:
+    # Plain ASGI so streaming responses are timed until their last byte, not their headers
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        trace = Trace(scope["path"])
+        token = current_trace.set(trace)
+        status = 500
+
+        async def traced_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, traced_send)
+        finally:
+            current_trace.reset(token)
+            # The router leaves the matched route in the (shared) scope
+            route = scope.get("route")
+            trace.finish(status, getattr(route, "path", None))
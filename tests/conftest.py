@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The app is a flat set of modules at the repo root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0, ROOT)
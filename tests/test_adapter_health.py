@@ -0,0 +1,44 @@
+import time
+from retailers import AdapterHealth
+
+
+def test_benched_after_too_many_failures():
+    health = AdapterHealth(window=10, min_samples=5, min_success=0.3, cooldown=300)
+    for _ in range(4): health.record(False, 1.0)
+    assert health.enabled()  # not enough samples yet
+    health.record(False, 1.0)
+    assert not health.enabled()
+    assert health.stats()["enabled"] is False
+
+
+def test_benched_when_consistently_slow():
+    health = AdapterHealth(min_samples=5, max_latency=12.0)
+    for _ in range(5): health.record(True, 20.0)
+    assert not health.enabled()
+
+
+def test_mixed_results_above_threshold_stay_enabled():
+    health = AdapterHealth(min_samples=5, min_success=0.3)
+    for ok in (True, False, False, True, False, True): health.record(ok, 2.0)
+    assert health.enabled()
+
+
+def test_one_probe_after_cooldown_decides(monkeypatch):
+    health = AdapterHealth(min_samples=5, cooldown=300)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    for _ in range(5): health.record(False, 1.0)
+    assert not health.enabled()
+
+    # Cooldown over: one probe is let through; it fails and the adapter is benched again
+    monkeypatch.setattr(time, "time", lambda: now + 301)
+    assert health.enabled()
+    health.record(False, 1.0)
+    assert not health.enabled()
+
+    # Next probe succeeds: back in rotation
+    monkeypatch.setattr(time, "time", lambda: now + 700)
+    assert health.enabled()
+    health.record(True, 1.0)
+    assert health.enabled()
+    assert health.last == (True, 1.0)
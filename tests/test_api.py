@@ -0,0 +1,45 @@
+import os
+import sys
+import importlib
+import pytest
+
+pytest.importorskip("fastapi.testclient")
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    # Fresh app on throwaway stores; no lifespan, so no browser is launched
+    tmp = tmp_path_factory.mktemp("app")
+    env = {"ZIVA_PRICE_DB": str(tmp / "prices.sqlite"), "ZIVA_IDENTITY_DB": str(tmp / "ids.sqlite"),
+           "ZIVA_JOB_MODE": "0", "GEMINI_API_KEY": ""}
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    sys.modules.pop("app", None)
+    app = importlib.import_module("app")
+    yield TestClient(app.app)
+    for key, value in saved.items():
+        if value is None: os.environ.pop(key, None)
+        else: os.environ[key] = value
+    sys.modules.pop("app", None)
+
+
+@pytest.mark.parametrize("budget", ["abc", "-1", "0", "nan"])
+def test_bad_budgets_are_rejected(client, budget):
+    assert client.get("/analyze", params={"title": "iPhone 15", "budget": budget}).status_code == 422
+    assert client.post("/scan", json={"url": "iPhone 15", "budget": budget}).status_code == 422
+
+
+def test_batch_accepts_string_prices(client):
+    response = client.post("/analyze/batch", json={"items": [
+        {"title": "XQZRTK 16TB SSD", "price": "₹1,500", "reviews": "12"},
+        {"title": "Samsung 980 PRO 2TB NVMe SSD", "price": "12,999", "reviews": "2,300 ratings"},
+        {"title": "Apple iPhone 15 case", "price": "n/a"},
+        42,
+    ]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["title"] for r in results] == ["XQZRTK 16TB SSD", "Samsung 980 PRO 2TB NVMe SSD", "Apple iPhone 15 case"]
+    assert results[0]["verdict"] == "SUSPICIOUS" and results[0]["engine"] == "rules"
+    assert results[1]["verdict"] == "SAFE"
+    assert results[2]["verdict"] != "SUSPICIOUS"
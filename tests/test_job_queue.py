@@ -0,0 +1,98 @@
+import time
+import pytest
+from job_queue import JobQueue, check_callback, QUEUED, RUNNING, DONE, FAILED
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(db_path=str(tmp_path / "jobs.sqlite"), max_attempts=2)
+
+
+def test_submit_and_get(queue):
+    job_id = queue.submit("scan", {"url": "iphone 15"}, "https://hooks.example/x")
+    job = queue.get(job_id)
+    assert job["status"] == QUEUED and job["position"] == 0
+    assert queue.get("missing") is None
+
+
+def test_a_job_is_leased_to_one_worker(queue):
+    job_id = queue.submit("scan", {"url": "a"})
+    claimed = queue.claim("w1", lease=60)
+    assert claimed["id"] == job_id and claimed["payload"] == {"url": "a"} and claimed["attempt"] == 1
+    assert queue.claim("w2", lease=60) is None
+    assert queue.get(job_id)["status"] == RUNNING
+
+
+def test_oldest_job_first(queue):
+    first = queue.submit("scan", {"url": "a"})
+    queue.submit("scan", {"url": "b"})
+    assert queue.claim("w1")["id"] == first
+
+
+def test_expired_lease_is_picked_up_again(queue, monkeypatch):
+    job_id = queue.submit("scan", {"url": "a"})
+    queue.claim("w1", lease=60)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    again = queue.claim("w2", lease=60)
+    assert again["id"] == job_id and again["attempt"] == 2
+
+
+def test_renewed_lease_is_kept(queue, monkeypatch):
+    queue.submit("scan", {"url": "a"})
+    job = queue.claim("w1", lease=60)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 50)
+    queue.renew(job["id"], "w1", lease=60)
+    monkeypatch.setattr(time, "time", lambda: now + 100)
+    assert queue.claim("w2", lease=60) is None
+
+
+def test_gives_up_after_max_attempts(queue, monkeypatch):
+    job_id = queue.submit("scan", {"url": "a"})
+    now = time.time()
+    for attempt in range(2):
+        monkeypatch.setattr(time, "time", lambda: now + attempt * 100)
+        assert queue.claim(f"w{attempt}", lease=60)
+    monkeypatch.setattr(time, "time", lambda: now + 300)
+    assert queue.claim("w9", lease=60) is None
+    assert queue.get(job_id)["status"] == FAILED
+
+
+def test_only_the_lease_holder_finishes(queue, monkeypatch):
+    job_id = queue.submit("scan", {"url": "a"})
+    queue.claim("w1", lease=60)
+    queue.finish(job_id, "someone-else", result={"x": 1})
+    assert queue.get(job_id)["status"] == RUNNING
+    queue.finish(job_id, "w1", result={"x": 1})
+    job = queue.get(job_id)
+    assert job["status"] == DONE and job["result"] == {"x": 1}
+    assert queue.stats() == {QUEUED: 0, RUNNING: 0, DONE: 1, FAILED: 0}
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/hook",
+    "http://localhost:8000/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://10.1.2.3/hook",
+    "http://192.168.0.10/hook",
+    "http://[::1]/hook",
+    "http://[::ffff:127.0.0.1]/hook",
+    "http://224.0.0.1/hook",
+    "ftp://8.8.8.8/hook",
+    "not a url",
+])
+def test_callbacks_to_internal_addresses_are_refused(url):
+    with pytest.raises(ValueError):
+        check_callback(url)
+
+
+def test_public_callback_is_accepted():
+    assert check_callback("https://8.8.8.8/hook") == "https://8.8.8.8/hook"
+
+
+def test_callback_allowlist(monkeypatch):
+    monkeypatch.setattr("job_queue.CALLBACK_HOSTS", {"hooks.internal"})
+    assert check_callback("http://hooks.internal/x")
+    with pytest.raises(ValueError):
+        check_callback("https://8.8.8.8/hook")
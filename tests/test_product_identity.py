@@ -0,0 +1,49 @@
+import pytest
+from product_identity import ProductResolver, signature, url_identifiers
+
+
+def clean(title):
+    # Same cut as the app's clean_title_for_search: specs in brackets are lost
+    return " ".join((title or "").split("|")[0].split("(")[0].split(" - ")[0].split()[:5])
+
+
+@pytest.fixture
+def resolver(tmp_path):
+    return ProductResolver(clean, db_path=str(tmp_path / "ids.sqlite"))
+
+
+def test_signature_keeps_capacity_and_ram():
+    assert signature("Samsung 980 PRO 2TB") != signature("Samsung 980 PRO 1TB")
+    assert signature("Apple iPhone 15", "Apple iPhone 15 (256 GB)") == "apple iphone 15 256gb"
+    assert signature("OnePlus 13R 5G", "OnePlus 13R 5G (Nebula Noir, 8GB RAM, 256GB)") == "oneplus 13r 8gb ram 256gb"
+
+
+def test_signature_drops_colour_and_listing_noise():
+    assert signature("Redmi Note 13 Blue 6.7inch 120Hz 50MP") == "redmi note 13"
+
+
+def test_variants_get_separate_ids(resolver):
+    small = resolver.resolve("Samsung 980 PRO 1TB NVMe SSD")
+    large = resolver.resolve("Samsung 980 PRO 2TB NVMe SSD")
+    assert small != large
+    base = resolver.resolve("Apple iPhone 15 (128 GB) - Black")
+    bigger = resolver.resolve("Apple iPhone 15 (256 GB) - Black")
+    assert base != bigger
+
+
+def test_phrasings_of_one_variant_share_an_id(resolver):
+    first = resolver.resolve("OnePlus 13R 5G (Nebula Noir, 8GB RAM, 256GB)")
+    assert resolver.resolve("OnePlus 13R 5G (Black, 8 GB RAM, 256 GB)") == first
+    assert resolver.resolve("OnePlus 13R (12GB RAM, 256GB)") != first
+
+
+def test_urls_and_learned_aliases(resolver, tmp_path):
+    url = "https://www.amazon.in/Apple-iPhone-15/dp/B0CHX1W1XY?tag=x"
+    assert url_identifiers(url) == ["asin:B0CHX1W1XY"]
+    product_id = resolver.resolve("Apple iPhone 15 (128 GB) - Black", url)
+    resolver.learn(product_id, "Apple iPhone 15 128GB Black", "https://www.flipkart.com/x/p/itm6ac6485515ae4?pid=MOBGTAGPTB3VS24W")
+
+    assert resolver.known(url) == (product_id, "Apple iPhone 15 (128 GB) - Black")
+    # Aliases persist
+    reopened = ProductResolver(clean, db_path=str(tmp_path / "ids.sqlite"))
+    assert reopened.resolve(None, "https://www.flipkart.com/apple/p/itm6ac6485515ae4?pid=MOBGTAGPTB3VS24W") == product_id
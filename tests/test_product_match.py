@@ -0,0 +1,40 @@
+from product_match import ProductMatcher, attributes
+
+
+def cards(*titles):
+    return [{"title": title, "position": i} for i, title in enumerate(titles)]
+
+
+def test_exact_variant_beats_siblings():
+    matcher = ProductMatcher("Apple iPhone 15 (128 GB) - Black")
+    best, confidence = matcher.best(cards("Apple iPhone 15 Plus (128 GB) - Black",
+                                          "Apple iPhone 15 (256 GB) - Black",
+                                          "Apple iPhone 15 (128 GB) - Black"))
+    assert best["position"] == 2
+    assert 0 < confidence <= 1
+
+
+def test_ties_go_to_the_first_card():
+    matcher = ProductMatcher("Apple iPhone 15 128GB")
+    best, _ = matcher.best(cards("Apple iPhone 15 128GB", "Apple iPhone 15 128GB", "Apple iPhone 15 128GB"))
+    assert best["position"] == 0
+
+
+def test_photo_finish_lowers_confidence():
+    matcher = ProductMatcher("Apple iPhone 15 128GB")
+    _, clear = matcher.best(cards("Apple iPhone 15 128GB", "Samsung Galaxy S24"))
+    _, tied = matcher.best(cards("Apple iPhone 15 128GB", "Apple iPhone 15 128GB"))
+    assert tied < clear
+
+
+def test_nothing_above_min_score():
+    matcher = ProductMatcher("Apple iPhone 15 128GB", min_score=60)
+    assert matcher.best(cards("Philips Air Fryer HD9252")) == (None, 0.0)
+    assert matcher.best([]) == (None, 0.0)
+
+
+def test_attributes():
+    attrs = attributes("OnePlus 13R 5G (Nebula Noir, 12GB RAM, 1 TB)")
+    assert attrs["brand"] == "oneplus"
+    assert attrs["ram"] == 12 and attrs["storage"] == 1024
+    assert "13r" in attrs["model"]
@@ -0,0 +1,58 @@
+import time
+from result_cache import ResultCache
+
+
+def test_hit_miss_and_cached_empty_values():
+    cache = ResultCache(max_entries=10)
+    assert cache.get("market", "iphone 15") == (False, None)
+    cache.set("market", "iphone 15", [])
+    assert cache.get("market", "iphone 15") == (True, [])
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_sources_are_separate():
+    cache = ResultCache(max_entries=10)
+    cache.set("market", "key", "prices")
+    assert cache.get("history", "key") == (False, None)
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    cache = ResultCache(max_entries=10, ttls={"market": 60})
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.set("market", "key", 1)
+    monkeypatch.setattr(time, "time", lambda: now + 59)
+    assert cache.get("market", "key") == (True, 1)
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("market", "key") == (False, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.set("market", "a", 1)
+    cache.set("market", "b", 2)
+    cache.get("market", "a")  # b is now the oldest
+    cache.set("market", "c", 3)
+    assert cache.get("market", "b") == (False, None)
+    assert cache.get("market", "a") == (True, 1)
+    assert cache.get("market", "c") == (True, 3)
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ResultCache(max_entries=10, db_path=path).set("history", "iphone 15", {"lowest": 52999})
+
+    fresh = ResultCache(max_entries=10, db_path=path)
+    assert fresh.get("history", "iphone 15") == (True, {"lowest": 52999})
+    # ...and is promoted into memory
+    assert fresh.expires_in("history", "iphone 15") > 0
+
+
+def test_expired_disk_entries_are_misses(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    ResultCache(max_entries=10, db_path=path, ttls={"market": 60}).set("market", "key", 1)
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert ResultCache(max_entries=10, db_path=path).get("market", "key") == (False, None)
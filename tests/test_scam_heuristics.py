@@ -0,0 +1,62 @@
+import pytest
+from scam_heuristics import assess, prescreen, classify, as_number
+
+
+def test_impossible_price_per_gb_is_a_confident_scam():
+    verdict = assess("XQZRTK 16TB SSD Portable", 1500, 0)
+    assert verdict["verdict"] == "SUSPICIOUS"
+    assert verdict["confident"] and verdict["engine"] == "rules"
+    assert "16TB SSD" in verdict["reason"]
+
+
+def test_established_listing_is_confidently_safe():
+    verdict = assess("Samsung 980 PRO 2TB NVMe SSD", 12999, 2300)
+    assert verdict["verdict"] == "SAFE" and verdict["confident"]
+
+
+def test_unknown_product_is_left_to_the_llm():
+    assert prescreen("Zorblat desk lamp", 899, 0) is None
+
+
+@pytest.mark.parametrize("title, price", [
+    ("Apple iPhone 15 case", 999),
+    ("Spigen cover for Samsung Galaxy S24", 1299),
+    ("Apple 20W adapter for iPhone", 1599),
+    ("Laptop backpack 15.6 inch", 1200),
+    ("Tempered glass screen protector for iPhone 15", 299),
+    ("Nokia 105 feature phone", 1299),
+])
+def test_accessories_and_feature_phones_skip_device_floors(title, price):
+    verdict = assess(title, price, 0)
+    assert verdict["verdict"] != "SUSPICIOUS"
+    assert prescreen(title, price, 0) is None
+
+
+def test_device_floor_still_applies_to_the_device_itself():
+    verdict = assess("Samsung Galaxy S24 Ultra 12GB RAM 256GB", 4999, 0)
+    assert verdict["verdict"] == "SUSPICIOUS" and verdict["confident"]
+
+
+def test_devices_are_classified_before_their_components():
+    assert classify("HP 15s Laptop 16GB RAM 512GB SSD") == ("laptop", False)
+    assert classify("Crucial 1TB SSD for laptop") == ("ssd", False)
+    assert classify("boAt power bank 10000mAh with type C cable") == ("powerbank", False)
+
+
+def test_weak_keyword_floor_hit_is_never_confident():
+    assert classify("JioFiber 5G router") == ("phone", True)
+    verdict = assess("JioFiber 5G router", 1500, 0)
+    assert verdict["verdict"] == "SUSPICIOUS"
+    assert not verdict["confident"]
+
+
+@pytest.mark.parametrize("price", ["₹1,500", "1,500", "1500.00", 1500.0])
+def test_string_prices_are_read_as_numbers(price):
+    verdict = assess("XQZRTK 16TB SSD", price, "12")
+    assert verdict["verdict"] == "SUSPICIOUS" and verdict["confident"]
+
+
+@pytest.mark.parametrize("value", [None, "", "n/a", [], {}, True, float("nan"), float("inf"), -5])
+def test_junk_numbers_count_as_missing(value):
+    assert as_number(value) == 0
+    assert assess("Samsung 980 PRO 2TB NVMe SSD", value, value)["verdict"] in ("SAFE", "UNKNOWN")
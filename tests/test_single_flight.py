@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_run():
+    flights = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def main():
+        return await asyncio.gather(*(flights.do("key", fetch) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert [value for value, _ in results] == ["value"] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flights.stats() == {"in_flight": 0, "started": 1, "coalesced": 4}
+
+
+def test_different_keys_run_separately():
+    flights = SingleFlight()
+
+    async def main():
+        return await asyncio.gather(flights.do("a", lambda: asyncio.sleep(0, "a")),
+                                    flights.do("b", lambda: asyncio.sleep(0, "b")))
+
+    assert asyncio.run(main()) == [("a", False), ("b", False)]
+    assert flights.started == 2
+
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    flights = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("hunter failed")
+
+    async def main():
+        return await asyncio.gather(flights.do("key", boom), flights.do("key", boom), return_exceptions=True)
+
+    assert [str(e) for e in asyncio.run(main())] == ["hunter failed", "hunter failed"]
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_last_waiter_leaving_cancels_the_shared_task():
+    flights = SingleFlight()
+    started = None
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def main():
+        nonlocal started
+        waiter = asyncio.create_task(flights.do("key", slow))
+        await asyncio.sleep(0.01)
+        started = flights._flights["key"].task
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert started.cancelled()
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_one_waiter_leaving_keeps_the_run_for_the_others():
+    flights = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main():
+        quitter = asyncio.create_task(flights.do("key", fetch))
+        stayer = asyncio.create_task(flights.do("key", fetch))
+        await asyncio.sleep(0.01)
+        quitter.cancel()
+        return await stayer
+
+    assert asyncio.run(main()) == (42, True)
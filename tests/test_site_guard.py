@@ -0,0 +1,90 @@
+import os
+import time
+import asyncio
+import pytest
+from site_guard import SiteGuard, SiteBlocked, TokenBucket, detect_block
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench", "fixtures")
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_captcha_page_is_detected():
+    assert detect_block(fixture("amazon_captcha.html")) == "captcha"
+
+
+@pytest.mark.parametrize("name", ["amazon_search.html", "flipkart_search.html", "croma_search.html",
+                                  "pricehistory_product.html", "amazon_product_ld.html"])
+def test_real_pages_are_not_blocks(name):
+    assert detect_block(fixture(name)) is None
+
+
+def test_denial_phrases():
+    assert detect_block("<title>Access Denied</title><body>nope</body>") == "access denied"
+    assert detect_block("<html><body><div class='g-recaptcha'></div></body></html>") == "captcha"
+    assert detect_block("") is None
+
+
+def test_token_bucket_allows_a_burst_then_paces(monkeypatch):
+    # Fake clock: sleeping advances it, so the pacing is exact however loaded the machine is
+    clock = [1000.0]
+    real_sleep = asyncio.sleep
+
+    async def sleep(seconds):
+        clock[0] += seconds
+        await real_sleep(0)
+
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    bucket = TokenBucket(rate=20, burst=2)
+
+    async def main():
+        return [await bucket.take() for _ in range(4)]
+
+    assert asyncio.run(main()) == [0, 0, pytest.approx(0.05), pytest.approx(0.05)]
+    assert clock[0] == pytest.approx(1000.1)
+
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    guard = SiteGuard(rate=100, burst=1, backoff=60, max_backoff=200)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    waits = []
+    for _ in range(4):
+        guard._until.clear()
+        assert isinstance(guard.report_block("croma", "captcha"), SiteBlocked)
+        waits.append(round(guard.backing_off("croma")))
+    assert waits == [60, 120, 200, 200]
+    guard.report_ok("croma")
+    guard._until.clear()
+    guard.report_block("croma", "captcha")
+    assert round(guard.backing_off("croma")) == 60
+
+
+def test_acquire_fails_fast_while_backing_off():
+    guard = SiteGuard(rate=100, burst=1, backoff=60)
+    guard.report_block("flipkart", "HTTP 429")
+    with pytest.raises(SiteBlocked):
+        asyncio.run(guard.acquire("flipkart"))
+    asyncio.run(guard.acquire("amazon"))  # other sites unaffected
+
+
+def test_status_and_page_checks():
+    guard = SiteGuard(backoff=60)
+    with pytest.raises(SiteBlocked):
+        guard.check_status("reliance", 403)
+    guard.check_status("vijaysales", 200)
+    guard.check_page("vijaysales", fixture("vijaysales_search.html"))
+    with pytest.raises(SiteBlocked):
+        guard.check_page("amazon", fixture("amazon_captcha.html"))
+    assert guard.backing_off("amazon") > 0 and not guard.backing_off("vijaysales")
+
+
+def test_hold_mirrors_a_backoff_without_a_strike():
+    guard = SiteGuard(backoff=60)
+    guard.hold("croma", 30)
+    assert 0 < guard.backing_off("croma") <= 30
+    assert guard.stats()["sites"]["croma"]["strikes"] == 0
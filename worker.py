@@ -0,0 +1,33 @@
+import os
+import signal
+import asyncio
+
+# Scan worker process for job mode: its own browser pool, HTTP client and caches, fed from
+# the shared job queue (ZIVA_JOB_DB). Run as many as the box allows:
+#   ZIVA_JOB_DB=/data/jobs.sqlite python worker.py
+os.environ.setdefault("ZIVA_JOB_MODE", "1")
+os.environ["ZIVA_JOB_INLINE_WORKERS"] = "0"  # this process *is* the worker
+
+import app as ziva
+from job_queue import ScanWorker
+from fast_fetch import http_client
+
+
+async def main():
+    worker = ScanWorker(ziva.job_queue, ziva.run_job, notify=http_client.post_json)
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try: loop.add_signal_handler(sig, stopping.set)
+        except NotImplementedError: pass  # Windows
+
+    # Same startup/shutdown as the API (browser pool, pre-warmer, HTTP client)
+    async with ziva.lifespan(ziva.app):
+        worker.start()
+        await stopping.wait()
+        print("🛠️ Worker: Shutting down, running jobs will be picked up again after their lease")
+        await worker.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())